@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the TOPSIS pipeline.
+
+Times every stage of the CLI pipeline (weight/impact parsing, CSV reading,
+numeric coercion, scoring, ranking and CSV writing, including the streamed
+writer with --scores-only and gzip/zstd compression) on synthetic matrices
+generated from a fixed seed, and records wall time and peak traced memory
+into a JSON file:
+
+    python benchmarks/bench_topsis.py run --out baseline.json
+    python benchmarks/bench_topsis.py run --out current.json
+    python benchmarks/bench_topsis.py compare baseline.json current.json --threshold 0.25
+
+`compare` exits with status 1 when a stage got slower than the threshold
+allows, so it can gate CI jobs. `import-time` checks the start-up cost of a
+small CLI run in a fresh interpreter and fails when it is over budget or
+when pandas gets imported:
+
+    python benchmarks/bench_topsis.py import-time --budget-ms 300
+
+`backends` cross-checks every installed scoring backend against the NumPy
+reference and times it; it exits with status 1 when scores disagree:
+
+    python benchmarks/bench_topsis.py backends
+
+`threads` times compute_topsis with workers=1, 2, 4 and 8 and prints the
+speedup over one thread; it exits with status 1 when any thread count gives
+scores that are not bit-identical to the single-threaded run:
+
+    python benchmarks/bench_topsis.py threads --workers 1 2 4 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from topsis_mrinank_102303235 import backends  # noqa: E402
+from topsis_mrinank_102303235.formats import write_table  # noqa: E402
+from topsis_mrinank_102303235.cli import (  # noqa: E402
+    parse_weights,
+    parse_impacts,
+    read_and_validate_csv,
+    ensure_numeric,
+    compute_topsis,
+    rank_rounded,
+)
+
+DEFAULT_ROWS = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_CRITERIA = [3, 20, 200]
+# Large enough for the 10M x 3 case
+DEFAULT_MAX_CELLS = 30_000_000
+DEFAULT_IMPORT_BUDGET_MS = 300
+BACKEND_SHAPES = [(1_000, 3), (100_000, 20), (20_000, 200), (1_000_000, 10)]
+# Largest allowed score difference from the float64 NumPy reference
+BACKEND_TOLERANCE = {"float64": 1e-12, "float32": 1e-6}
+THREAD_SHAPES = [(1_000_000, 10), (4_000_000, 5)]
+DEFAULT_WORKERS = [1, 2, 4, 8]
+SEED = 102303235
+
+
+def synthetic_frame(rows, criteria, seed=SEED):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.uniform(1, 100, size=(rows, criteria)).round(3),
+                      columns=[f"C{j + 1}" for j in range(criteria)])
+    df.insert(0, "Alternative", [f"A{i + 1}" for i in range(rows)])
+    return df
+
+
+def measure(func, repeat):
+    """Best wall time over `repeat` runs, then one traced run for peak memory"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def bench_case(rows, criteria, repeat, workdir):
+    df = synthetic_frame(rows, criteria)
+    weights_str = ",".join(["1"] * criteria)
+    impacts_str = ",".join(["+", "-"] * (criteria // 2) + ["+"] * (criteria % 2))
+    input_file = os.path.join(workdir, "input.csv")
+    output_file = os.path.join(workdir, "output.csv")
+    df.to_csv(input_file, index=False)
+    cols = list(range(1, df.shape[1]))
+    weights = parse_weights(weights_str)
+    impacts = parse_impacts(impacts_str)
+    data_mat = ensure_numeric(df, cols).values
+    score = np.round(compute_topsis(data_mat, weights, impacts), 6)
+    scored = df.copy()
+    scored["Topsis Score"] = score
+    scored["Rank"] = rank_rounded(score)
+
+    scores_only = scored.iloc[:, [0, -2, -1]]
+    stages = {
+        "parse_weights": lambda: parse_weights(weights_str),
+        "parse_impacts": lambda: parse_impacts(impacts_str),
+        "read_and_validate_csv": lambda: read_and_validate_csv(input_file),
+        "ensure_numeric": lambda: ensure_numeric(df, cols),
+        "compute_topsis": lambda: compute_topsis(data_mat, weights, impacts),
+        "rank": lambda: rank_rounded(score),
+        "to_csv": lambda: scored.to_csv(output_file, index=False),
+        "write_stream": lambda: write_table(scored, output_file),
+        "write_scores_only": lambda: write_table(scores_only, output_file),
+        "write_gzip": lambda: write_table(scored, output_file + ".gz"),
+    }
+    try:
+        import zstandard  # noqa: F401
+        stages["write_zstd"] = lambda: write_table(scored, output_file + ".zst")
+    except ImportError:
+        pass
+    results = {}
+    for name, func in stages.items():
+        results[f"{name}/{rows}x{criteria}"] = measure(func, repeat)
+    for filename in (input_file, output_file, output_file + ".gz", output_file + ".zst"):
+        if os.path.exists(filename):
+            os.remove(filename)
+    return results
+
+
+def run(args):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for criteria in args.criteria:
+            for rows in args.rows:
+                if rows * criteria > args.max_cells:
+                    print(f"skip {rows}x{criteria} (over --max-cells {args.max_cells})")
+                    continue
+                print(f"bench {rows}x{criteria}", flush=True)
+                case = bench_case(rows, criteria, args.repeat, workdir)
+                for key, value in case.items():
+                    print(f"  {key:<40} {value['seconds'] * 1000:10.3f} ms {value['peak_bytes'] / 2**20:10.1f} MB")
+                results.update(case)
+    report = {
+        "meta": {
+            "seed": SEED,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print("Results written to", args.out)
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+    failures = []
+    for key in sorted(set(baseline) & set(current)):
+        base, cur = baseline[key], current[key]
+        # Sub-millisecond stages are dominated by timer noise
+        slower = cur["seconds"] > base["seconds"] * (1 + args.threshold) and cur["seconds"] - base["seconds"] > args.min_seconds
+        bigger = args.memory_threshold is not None and cur["peak_bytes"] > base["peak_bytes"] * (1 + args.memory_threshold)
+        ratio = cur["seconds"] / base["seconds"] if base["seconds"] else float("inf")
+        flag = "REGRESSION" if slower or bigger else "ok"
+        print(f"{key:<40} {base['seconds'] * 1000:10.2f} ms -> {cur['seconds'] * 1000:10.2f} ms ({ratio:5.2f}x) "
+              f"{base['peak_bytes'] / 2**20:8.1f} MB -> {cur['peak_bytes'] / 2**20:8.1f} MB  {flag}")
+        if slower or bigger:
+            failures.append(key)
+    missing = sorted(set(baseline) - set(current))
+    if missing:
+        print("Not measured in current run:", ", ".join(missing))
+    if failures:
+        print(f"{len(failures)} stage(s) regressed beyond the threshold")
+        sys.exit(1)
+    print("No regressions")
+
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+from topsis_mrinank_102303235.cli import run_topsis
+run_topsis(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4])
+print(time.perf_counter() - start, 'pandas' in sys.modules)
+"""
+
+
+def import_time(args):
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=repo + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    with tempfile.TemporaryDirectory() as workdir:
+        input_file = os.path.join(workdir, "input.csv")
+        output_file = os.path.join(workdir, "output.csv")
+        synthetic_frame(args.rows, args.criteria).to_csv(input_file, index=False)
+        weights_str = ",".join(["1"] * args.criteria)
+        impacts_str = ",".join(["+"] * args.criteria)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", IMPORT_PROBE, input_file, weights_str, impacts_str, output_file],
+                                 env=env, check=True, capture_output=True, text=True).stdout.split()
+            total = time.perf_counter() - start
+            best = min(best, total)
+            pandas_loaded = out[-1] == "True"
+    print(f"{args.rows}x{args.criteria} CLI run: {best * 1000:.1f} ms total (budget {args.budget_ms} ms), "
+          f"pandas imported: {pandas_loaded}")
+    if pandas_loaded or best * 1000 > args.budget_ms:
+        print("Start-up budget exceeded")
+        sys.exit(1)
+    print("Within budget")
+
+
+def check_backends(args):
+    names = backends.available_backends()
+    print("Available backends:", ", ".join(names))
+    failures = []
+    for rows, criteria in args.shapes:
+        df = synthetic_frame(rows, criteria)
+        data_mat = ensure_numeric(df, list(range(1, df.shape[1]))).to_numpy(copy=True)
+        # Duplicated rows and one row at the ideal solution cover ties and zero separations
+        data_mat[1::7] = data_mat[::7][:len(data_mat[1::7])]
+        data_mat[0] = data_mat.max(axis=0)
+        weights = parse_weights(",".join(str(1 + j % 3) for j in range(criteria)))
+        impacts = ["+"] * criteria
+        reference = compute_topsis(data_mat, weights, impacts, backend="numpy")
+        for dtype in ("float64", "float32"):
+            for name in names:
+                compute_topsis(data_mat[:16], weights, impacts, dtype=dtype, backend=name)
+                start = time.perf_counter()
+                score = compute_topsis(data_mat, weights, impacts, dtype=dtype, backend=name)
+                seconds = time.perf_counter() - start
+                diff = float(np.abs(score - reference).max())
+                ok = diff <= BACKEND_TOLERANCE[dtype]
+                print(f"  {rows}x{criteria} {dtype:<8} {name:<8} {seconds * 1000:10.2f} ms  max diff {diff:.2e}  {'ok' if ok else 'MISMATCH'}")
+                if not ok:
+                    failures.append(f"{name} {dtype} {rows}x{criteria}")
+    if failures:
+        print("Backends disagree with the NumPy reference:", ", ".join(failures))
+        sys.exit(1)
+    print("All backends agree")
+
+
+def check_threads(args):
+    print(f"CPUs: {os.cpu_count()}")
+    failures = []
+    for rows, criteria in args.shapes:
+        df = synthetic_frame(rows, criteria)
+        data_mat = ensure_numeric(df, list(range(1, df.shape[1]))).to_numpy()
+        del df
+        weights = parse_weights(",".join(str(1 + j % 3) for j in range(criteria)))
+        impacts = ["+", "-"] * (criteria // 2) + ["+"] * (criteria % 2)
+        reference = None
+        for workers in args.workers:
+            func = lambda: compute_topsis(data_mat, weights, impacts, backend=args.backend, workers=workers)
+            score = func()
+            if reference is None:
+                reference = score
+            seconds = measure(func, args.repeat)["seconds"]
+            if workers == args.workers[0]:
+                base = seconds
+            same = np.array_equal(score, reference)
+            print(f"  {rows}x{criteria} workers={workers:<3} {seconds * 1000:10.2f} ms  "
+                  f"speedup {base / seconds:5.2f}x  {'identical' if same else 'DIFFERENT'}")
+            if not same:
+                failures.append(f"workers={workers} {rows}x{criteria}")
+    if failures:
+        print("Scores depend on the number of workers:", ", ".join(failures))
+        sys.exit(1)
+    print("Scores are identical for every number of workers")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TOPSIS pipeline benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run", help="run the benchmarks and write a JSON report")
+    run_parser.add_argument("--out", default="bench_results.json")
+    run_parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS)
+    run_parser.add_argument("--criteria", type=int, nargs="+", default=DEFAULT_CRITERIA)
+    run_parser.add_argument("--max-cells", type=int, default=DEFAULT_MAX_CELLS,
+                            help="skip sizes with more rows x criteria than this")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    cmp_parser = sub.add_parser("compare", help="compare two reports and fail on regressions")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("current")
+    cmp_parser.add_argument("--threshold", type=float, default=0.25,
+                            help="allowed relative slowdown per stage (0.25 = 25%%)")
+    cmp_parser.add_argument("--memory-threshold", type=float, default=None,
+                            help="allowed relative growth of peak memory per stage")
+    cmp_parser.add_argument("--min-seconds", type=float, default=0.001,
+                            help="ignore slowdowns smaller than this many seconds")
+    imp_parser = sub.add_parser("import-time", help="time a small CLI run in a fresh interpreter")
+    imp_parser.add_argument("--rows", type=int, default=100)
+    imp_parser.add_argument("--criteria", type=int, default=5)
+    imp_parser.add_argument("--repeat", type=int, default=5)
+    imp_parser.add_argument("--budget-ms", type=float, default=DEFAULT_IMPORT_BUDGET_MS,
+                            help="fail when the best interpreter start-up plus run takes longer")
+    backend_parser = sub.add_parser("backends", help="cross-check and time the scoring backends")
+    backend_parser.add_argument("--shapes", type=lambda v: tuple(map(int, v.split("x"))), nargs="+",
+                                default=BACKEND_SHAPES, help="ROWSxCRITERIA sizes to check")
+    thread_parser = sub.add_parser("threads", help="time compute_topsis over thread counts and check the scores match")
+    thread_parser.add_argument("--shapes", type=lambda v: tuple(map(int, v.split("x"))), nargs="+",
+                               default=THREAD_SHAPES, help="ROWSxCRITERIA sizes to time")
+    thread_parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKERS)
+    thread_parser.add_argument("--backend", default="numpy")
+    thread_parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    elif args.command == "compare":
+        compare(args)
+    elif args.command == "import-time":
+        import_time(args)
+    elif args.command == "threads":
+        check_threads(args)
+    else:
+        check_backends(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Background email dispatch for the TOPSIS app.
+
+Emails are queued and sent by a small pool of worker threads sharing one
+pooled HTTP session, so the Streamlit script never blocks on SendGrid.
+Requests answered with 429 or 5xx (or failing at the network level) are
+retried with exponential backoff; the base URL can point at a local
+stand-in server (see sendgrid_stub.py) for testing.
+"""
+
+import os
+import time
+import uuid
+import queue
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_BASE = "https://api.sendgrid.com"
+MAX_PERSONALIZATIONS = 1000  # SendGrid limit per request
+JOB_TTL = 3600.0  # seconds a finished job stays queryable
+
+
+def sendgrid_api_base():
+    return os.getenv("SENDGRID_API_BASE", DEFAULT_API_BASE).rstrip("/")
+
+
+class EmailDispatcher:
+    """Queue of email jobs sent by `workers` threads with retry and backoff.
+
+    Finished jobs are forgotten `job_ttl` seconds after they finish, so a
+    long-lived dispatcher does not keep every email ever queued in memory;
+    status() returns None for them.
+    """
+
+    def __init__(self, api_key, sender_email, base_url=None, workers=2, max_retries=5,
+                 backoff=0.5, max_backoff=30.0, batch_size=MAX_PERSONALIZATIONS, timeout=10,
+                 job_ttl=JOB_TTL):
+        self.api_key = api_key
+        self.sender_email = sender_email
+        self.base_url = (base_url or sendgrid_api_base()).rstrip("/")
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.batch_size = min(batch_size, MAX_PERSONALIZATIONS)
+        self.timeout = timeout
+        self.job_ttl = job_ttl
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        })
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, recipients, subject, html):
+        """Queue one email to one or more recipients and return its job id"""
+        if isinstance(recipients, str):
+            recipients = [recipients]
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._prune(time.time())
+            self._jobs[job_id] = {
+                "status": "queued",
+                "recipients": list(recipients),
+                "sent": 0,
+                "attempts": 0,
+                "error": None,
+                "submitted_at": time.time(),
+                "finished_at": None,
+            }
+        self._queue.put((job_id, list(recipients), subject, html))
+        return job_id
+
+    def status(self, job_id):
+        """Snapshot of a job: status is queued, sending, retrying, sent or failed"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def wait(self, job_id, timeout=None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            job = self.status(job_id)
+            if job is None or job["status"] in ("sent", "failed"):
+                return job
+            if deadline is not None and time.time() >= deadline:
+                return job
+            time.sleep(0.05)
+
+    def close(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self.session.close()
+
+    def _prune(self, now):
+        # Called with the lock held
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job["finished_at"] is not None and now - job["finished_at"] > self.job_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            self._jobs[job_id].update(changes)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            job_id, recipients, subject, html = item
+            self._update(job_id, status="sending")
+            try:
+                for start in range(0, len(recipients), self.batch_size):
+                    batch = recipients[start:start + self.batch_size]
+                    self._send_batch(job_id, batch, subject, html)
+                    with self._lock:
+                        self._jobs[job_id]["sent"] += len(batch)
+                self._update(job_id, status="sent", error=None, finished_at=time.time())
+            except Exception as e:
+                self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+
+    def _send_batch(self, job_id, recipients, subject, html):
+        # One personalization per recipient so addresses are not shared between them
+        payload = {
+            "personalizations": [{"to": [{"email": r}], "subject": subject} for r in recipients],
+            "from": {"email": self.sender_email, "name": "TOPSIS Tool"},
+            "content": [{"type": "text/html", "value": html}]
+        }
+        url = f"{self.base_url}/v3/mail/send"
+        attempt = 0
+        while True:
+            attempt += 1
+            with self._lock:
+                self._jobs[job_id]["attempts"] += 1
+            retry_after = None
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                error = f"Network error sending email: {e}"
+            else:
+                if response.status_code == 202:
+                    return
+                error = f"SendGrid API error ({response.status_code}): {response.text or 'no details'}"
+                if response.status_code != 429 and response.status_code < 500:
+                    raise Exception(error)
+                retry_after = response.headers.get("Retry-After")
+            if attempt > self.max_retries:
+                raise Exception(error)
+            delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+            if retry_after is not None:
+                try:
+                    delay = min(self.max_backoff, max(delay, float(retry_after)))
+                except ValueError:
+                    pass
+            self._update(job_id, status="retrying", error=error)
+            time.sleep(delay)
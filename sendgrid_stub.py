@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the SendGrid endpoints used by the TOPSIS app.
+
+Run it and point the app or verify_sendgrid.py at it:
+
+    python sendgrid_stub.py --port 8025 --fail-first 2
+    SENDGRID_API_BASE=http://127.0.0.1:8025 python verify_sendgrid.py
+
+Any API key starting with 'SG.' is accepted. With --fail-first N the first
+N mail requests are answered with 429 to exercise the retry logic.
+"""
+
+import sys
+import json
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class SendGridStub(ThreadingHTTPServer):
+    def __init__(self, address, fail_first=0):
+        super().__init__(address, StubHandler)
+        self.fail_first = fail_first
+        self.requests = []
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def _authorized(self):
+        return self.headers.get("Authorization", "").startswith("Bearer SG.")
+
+    def _reply(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/v3/user/account":
+            return self._reply(404, {"errors": [{"message": "not found"}]})
+        if not self._authorized():
+            return self._reply(401, {"errors": [{"message": "authorization required"}]})
+        self._reply(200, {"type": "free", "reputation": 100})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/v3/mail/send":
+            return self._reply(404, {"errors": [{"message": "not found"}]})
+        if not self._authorized():
+            return self._reply(401, {"errors": [{"message": "authorization required"}]})
+        with self.server.lock:
+            self.server.requests.append(payload)
+            if self.server.fail_first > 0:
+                self.server.fail_first -= 1
+                return self._reply(429, {"errors": [{"message": "rate limited"}]}, {"Retry-After": "0"})
+        recipients = [to["email"] for p in payload.get("personalizations", []) for to in p.get("to", [])]
+        print(f"📨 Accepted mail for {', '.join(recipients)}", file=sys.stderr)
+        self._reply(202)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local SendGrid stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--fail-first", type=int, default=0, help="answer the first N mail requests with 429")
+    args = parser.parse_args()
+    server = SendGridStub((args.host, args.port), args.fail_first)
+    print(f"SendGrid stand-in listening on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
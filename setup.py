@@ -12,6 +12,11 @@ setup(
         "pandas",
         "numpy"
     ],
+    extras_require={
+        "columnar": ["pyarrow"],
+        "fast": ["numexpr", "numba"],
+        "zstd": ["zstandard"]
+    },
     entry_points={
         "console_scripts": [
             "topsis=topsis_mrinank_102303235.cli:main"
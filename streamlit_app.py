@@ -2,26 +2,19 @@ import streamlit as st
 import pandas as pd
 import io
 import os
+import hashlib
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
 import numpy as np
-import requests
 
 # Load environment variables (for local development)
 load_dotenv()
 
-def send_email_with_sendgrid(recipient_email: str, df, weights: str, impacts: str):
+def build_results_email(df, weights: str, impacts: str):
     """
-    Send TOPSIS results using SendGrid API (works on Streamlit Cloud)
+    HTML body summarising TOPSIS results
     """
-    api_key = st.secrets.get("SENDGRID_API_KEY") or os.getenv("SENDGRID_API_KEY")
-    sender_email = st.secrets.get("SENDER_EMAIL") or os.getenv("SENDER_EMAIL")
-    
-    if not api_key:
-        raise ValueError("SENDGRID_API_KEY not found. Add it to Streamlit Cloud Secrets or .env file.")
-    if not sender_email:
-        raise ValueError("SENDER_EMAIL not found. Add it to Streamlit Cloud Secrets or .env file.")
-    
-    # Build email body
     body_html = f"""
     <!DOCTYPE html>
     <html>
@@ -89,48 +82,187 @@ def send_email_with_sendgrid(recipient_email: str, df, weights: str, impacts: st
     </html>
     """
     
-    # SendGrid API payload
-    payload = {
-        "personalizations": [
-            {
-                "to": [{"email": recipient_email}],
-                "subject": "Your TOPSIS Analysis Results"
-            }
-        ],
-        "from": {"email": sender_email, "name": "TOPSIS Tool"},
-        "content": [
-            {
-                "type": "text/html",
-                "value": body_html
-            }
-        ]
-    }
+    return body_html
+
+
+@st.cache_resource
+def get_email_dispatcher(api_key: str, sender_email: str):
+    """One background dispatcher (worker threads + pooled session) per configuration"""
+    from email_dispatch import EmailDispatcher
+    return EmailDispatcher(api_key, sender_email)
+
+
+def queue_email_with_sendgrid(recipient_email: str, df, weights: str, impacts: str):
+    """
+    Queue TOPSIS results for sending through SendGrid (works on Streamlit Cloud).
+    Returns the job id; sending happens in the background.
+    """
+    api_key = st.secrets.get("SENDGRID_API_KEY") or os.getenv("SENDGRID_API_KEY")
+    sender_email = st.secrets.get("SENDER_EMAIL") or os.getenv("SENDER_EMAIL")
     
-    # Send via SendGrid API
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json"
-    }
+    if not api_key:
+        raise ValueError("SENDGRID_API_KEY not found. Add it to Streamlit Cloud Secrets or .env file.")
+    if not sender_email:
+        raise ValueError("SENDER_EMAIL not found. Add it to Streamlit Cloud Secrets or .env file.")
     
-    try:
-        response = requests.post(
-            "https://api.sendgrid.com/v3/mail/send",
-            json=payload,
-            headers=headers,
-            timeout=10
-        )
-        
-        if response.status_code == 202:
-            print(f"✅ Email sent to {recipient_email}")
-            return True
-        else:
-            # Detailed error message
-            error_msg = response.text if response.text else f"Status code: {response.status_code}"
-            print(f"❌ SendGrid Error ({response.status_code}): {error_msg}")
-            raise Exception(f"SendGrid API error:\n{error_msg}\n\nCommon fixes:\n1. Verify SENDGRID_API_KEY is correct\n2. Verify SENDER_EMAIL is a verified sender in SendGrid\n3. Check SendGrid account hasn't hit rate limits\n4. Go to SendGrid dashboard to check error logs")
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Request error: {str(e)}")
-        raise Exception(f"Network error sending email: {str(e)}\n\nChecklist:\n1. Check internet connection\n2. Check SendGrid API status\n3. Verify firewall isn't blocking requests")
+    dispatcher = get_email_dispatcher(api_key, sender_email)
+    recipients = [r.strip() for r in recipient_email.split(',') if r.strip()]
+    return dispatcher.submit(recipients, "Your TOPSIS Analysis Results", build_results_email(df, weights, impacts))
+
+
+def email_job_status(job_id: str):
+    api_key = st.secrets.get("SENDGRID_API_KEY") or os.getenv("SENDGRID_API_KEY")
+    sender_email = st.secrets.get("SENDER_EMAIL") or os.getenv("SENDER_EMAIL")
+    return get_email_dispatcher(api_key, sender_email).status(job_id)
+
+
+class ResultCache:
+    """
+    LRU cache for TOPSIS results, bounded by a memory budget.
+    Keys are built from the SHA-256 of the uploaded bytes, so the same file
+    uploaded again (by any user) is recognised regardless of its name.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_key(data: bytes):
+        return hashlib.sha256(data).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value, nbytes):
+        with self._lock:
+            if key in self._entries:
+                self.used_bytes -= self._entries.pop(key)[1]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self.used_bytes += nbytes
+            while self.used_bytes > self.max_bytes:
+                _, (_, size) = self._entries.popitem(last=False)
+                self.used_bytes -= size
+
+    def __len__(self):
+        return len(self._entries)
+
+
+CACHE_BUDGET_BYTES = int(os.getenv("TOPSIS_CACHE_MB", "256")) * 1024 * 1024
+
+
+@st.cache_resource
+def get_result_cache():
+    return ResultCache(CACHE_BUDGET_BYTES)
+
+
+# Fitted uploads are kept apart from the result LRU, so a large model is never
+# evicted by (or too big for) the per-slider results
+UPLOAD_CACHE_ENTRIES = int(os.getenv("TOPSIS_UPLOAD_CACHE_ENTRIES", "4"))
+
+
+@st.cache_resource(max_entries=UPLOAD_CACHE_ENTRIES, show_spinner="Reading and normalizing the file...")
+def load_upload(file_key: str, _uploaded_file):
+    """
+    The parsed and fitted upload for a content hash. Only the name column of the
+    frame is kept: the criteria live once, as floats, in the model's matrix and
+    are cast back to their uploaded dtypes when rows are shown.
+    """
+    from topsis_mrinank_102303235.cli import TopsisError, ensure_numeric
+    from topsis_mrinank_102303235.model import TopsisModel
+    df = pd.read_csv(io.BytesIO(_uploaded_file.getvalue()))
+    if df.shape[1] < 3:
+        raise TopsisError("Input file must contain at least 3 columns (1 name + 2 criteria)")
+    model = TopsisModel().fit(ensure_numeric(df, list(range(1, df.shape[1]))).values)
+    return {'names': df.iloc[:, :1].copy(), 'criteria': df.dtypes.iloc[1:], 'model': model}
+
+
+PAGE_SIZES = [25, 50, 100, 250]
+MAX_WEIGHT = 10.0
+WEIGHT_STEP = 0.1
+SLIDERS_PER_ROW = 4
+
+
+def upload_key(uploaded_file):
+    """Content hash of an upload, computed once per uploaded file instead of on every rerun"""
+    keys = st.session_state.setdefault("upload_keys", {})
+    if uploaded_file.file_id not in keys:
+        keys[uploaded_file.file_id] = ResultCache.file_key(uploaded_file.getvalue())
+    return keys[uploaded_file.file_id]
+
+
+def result_column(upload, results, column):
+    """Scores and ranks come from the result arrays, other columns from the upload"""
+    if column == 'Topsis Score':
+        return results['score']
+    if column == 'Rank':
+        return results['ranks']
+    return upload['names'][column].to_numpy()
+
+
+def sorted_rows(upload, results, column, ascending, start, stop):
+    """
+    Row positions of one page of the results sorted by a column. Score and rank
+    orders only select the rows up to the page (a partial selection instead of a
+    full sort on every weight change); other columns are sorted once per option.
+    """
+    if column in ('Topsis Score', 'Rank'):
+        from topsis_mrinank_102303235.cli import top_k
+        best_first = ascending == (column == 'Rank')
+        return top_k(results['score'] if best_first else -results['score'], stop)[0][start:]
+    orders = results.setdefault('orders', {})
+    key = (column, ascending)
+    if key not in orders:
+        ranked = pd.Series(result_column(upload, results, column))
+        orders[key] = ranked.sort_values(ascending=ascending, kind='stable').index.to_numpy()
+    return orders[key][start:stop]
+
+
+def result_rows(upload, results, rows):
+    """The uploaded rows at the given positions with their score and rank columns"""
+    frame = upload['names'].iloc[rows].copy()
+    values = upload['model'].data_mat[rows]
+    for j, (name, dtype) in enumerate(upload['criteria'].items()):
+        frame[name] = values[:, j].astype(dtype) if dtype.kind in 'iub' else values[:, j]
+    frame['Topsis Score'] = results['score'][rows]
+    frame['Rank'] = results['ranks'][rows]
+    return frame
+
+
+def page_controls(total_rows, key):
+    """Page size and page number widgets; returns the [start, stop) row slice to show"""
+    size_col, page_col, info_col = st.columns([1, 1, 2])
+    with size_col:
+        size = st.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_size")
+    pages = max(1, -(-total_rows // size))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with page_col:
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    start = (page - 1) * size
+    stop = min(start + size, total_rows)
+    with info_col:
+        st.caption(f"Showing {start + 1 if total_rows else 0}–{stop} of {total_rows} ({pages} pages)")
+    return start, stop
+
+
+def medal_labels(ranks):
+    ranks = np.asarray(ranks)
+    return np.select([ranks == 1, ranks == 2, ranks == 3], ["🥇", "🥈", "🥉"], default="") + \
+        np.where(ranks > 3, np.char.add("#", ranks.astype(str)), "")
+
 
 # Page configuration
 st.set_page_config(
@@ -158,10 +290,8 @@ st.title("🎯 TOPSIS Decision Support Tool")
 st.markdown("---")
 
 # Initialize session state
-if "topsis_results" not in st.session_state:
-    st.session_state.topsis_results = None
-if "email_sent" not in st.session_state:
-    st.session_state.email_sent = False
+if "email_job" not in st.session_state:
+    st.session_state.email_job = None
 
 # Create columns for layout
 col1, col2 = st.columns([1, 1])
@@ -197,17 +327,7 @@ with col1:
 with col2:
     st.subheader("⚙️ Configure TOPSIS")
     
-    weights_input = st.text_input(
-        "Enter weights (comma-separated, sum should be 1.0)",
-        placeholder="1,1,1",
-        help="e.g., 0.5,0.3,0.2 or 1,1,1"
-    )
-    
-    impacts_input = st.text_input(
-        "Enter impacts (+ or -, comma-separated)",
-        placeholder="+,+,-",
-        help="+ for benefit criteria, - for cost criteria. e.g., +,+,-,+"
-    )
+    st.write("Once a file is uploaded, set a weight and an impact for each criterion below. The results update as soon as one changes.")
     
     email_input = st.text_input(
         "Enter email address (optional)",
@@ -217,125 +337,153 @@ with col2:
 
 st.markdown("---")
 
-# Main processing
-if st.button("🚀 Run TOPSIS", use_container_width=True):
-    if uploaded_file is None:
-        st.error("❌ Please upload a CSV file")
-    elif not weights_input.strip():
-        st.error("❌ Please enter weights")
-    elif not impacts_input.strip():
-        st.error("❌ Please enter impacts")
-    else:
+# Main processing: the upload is parsed and fitted once (kept in the resource
+# cache); every widget change after that only reweights, rescores and reranks
+results = None
+if uploaded_file is not None:
+    try:
+        # Import TOPSIS from the PyPI package
         try:
-            # Read the uploaded file
-            df = pd.read_csv(uploaded_file)
-            
-            # Validate input
-            if df.shape[1] < 3:
-                st.error("❌ Input file must contain at least 3 columns (1 name + 2 criteria)")
-            else:
-                # Import TOPSIS from the PyPI package
-                try:
-                    from topsis_mrinank_102303235.cli import (
-                        parse_weights, 
-                        parse_impacts, 
-                        ensure_numeric, 
-                        compute_topsis
-                    )
-                except ImportError:
-                    st.error("❌ TOPSIS package not installed. Install with: pip install topsis-mrinank-102303235")
-                    st.stop()
-                
-                # Parse inputs
-                num_criteria = df.shape[1] - 1
-                weights = parse_weights(weights_input)
-                impacts = parse_impacts(impacts_input)
-                
-                # Validate
-                if len(weights) != num_criteria:
-                    st.error(f"❌ Number of weights ({len(weights)}) must equal number of criteria ({num_criteria})")
-                elif len(impacts) != num_criteria:
-                    st.error(f"❌ Number of impacts ({len(impacts)}) must equal number of criteria ({num_criteria})")
-                else:
-                    # Process TOPSIS
-                    criteria_data = ensure_numeric(df, list(range(1, df.shape[1])))
-                    data_mat = criteria_data.values
-                    score = compute_topsis(data_mat, weights, impacts)
-                    
-                    # Add results to dataframe
-                    df['Topsis Score'] = np.round(score, 6)
-                    df['Rank'] = df['Topsis Score'].rank(method='max', ascending=False).astype(int)
-                    
-                    # Store in session state
-                    st.session_state.topsis_results = {
-                        'df': df,
-                        'weights': weights_input,
-                        'impacts': impacts_input,
-                        'email': email_input.strip()
-                    }
-                    st.session_state.email_sent = False
-
-        except Exception as e:
-            st.error(f"❌ Error: {str(e)}")
-
-# Display results if they exist in session state
-if st.session_state.topsis_results is not None:
-    results = st.session_state.topsis_results
-    df = results['df']
+            from topsis_mrinank_102303235.profiling import StageProfile
+        except ImportError:
+            st.error("❌ TOPSIS package not installed. Install with: pip install topsis-mrinank-102303235")
+            st.stop()
+
+        cache = get_result_cache()
+        file_key = upload_key(uploaded_file)
+        upload = load_upload(file_key, uploaded_file)
+        model = upload['model']
+
+        st.subheader("⚖️ Weights and Impacts")
+        weights, impacts = [], []
+        grid = st.columns(min(SLIDERS_PER_ROW, model.num_criteria))
+        for j, name in enumerate(upload['criteria'].index):
+            with grid[j % len(grid)]:
+                weights.append(st.slider(str(name), 0.0, MAX_WEIGHT, 1.0, WEIGHT_STEP, key=f"weight_{file_key}_{j}"))
+                benefit = st.toggle("Benefit (+)", value=True, key=f"impact_{file_key}_{j}",
+                                    help="On: higher values are better. Off: lower values are better (cost).")
+                impacts.append('+' if benefit else '-')
+
+        if not any(weights):
+            st.warning("⚠️ Set at least one weight above zero")
+        else:
+            result_key = ('result', file_key, tuple(weights), tuple(impacts))
+            results = cache.get(result_key)
+            cached = results is not None
+            if results is None:
+                # Weighting, distances and ranks only, with the per-stage timings of the library
+                with StageProfile() as profile:
+                    score, ranks = model.rank(weights, impacts)
+                results = {
+                    'score': score,
+                    'ranks': ranks,
+                    'profile': profile.report(),
+                    'weights': ','.join(f"{w:g}" for w in weights),
+                    'impacts': ','.join(impacts),
+                }
+                cache.put(result_key, results, score.nbytes + ranks.nbytes)
+            elapsed_ms = results['profile']['total_wall_seconds'] * 1000
+            st.caption(f"⚡ Rescored {len(model):,} alternatives in {elapsed_ms:.1f} ms (weighting, distances, ranking)"
+                       + (" · reused from cache" if cached else ""))
+
+    except Exception as e:
+        st.error(f"❌ Error: {str(e)}")
+
+# Display results for the current weights and impacts
+if results is not None:
+    email = email_input.strip()
     
     st.success("✅ TOPSIS calculation completed successfully!")
     
     # Show results table
     st.subheader("📊 Results")
-    st.dataframe(df, use_container_width=True)
+    start, stop = page_controls(len(model), "results")
+    st.dataframe(result_rows(upload, results, slice(start, stop)), use_container_width=True)
     
     # Download results
-    csv_results = df.to_csv(index=False)
     st.download_button(
         label="📥 Download Results as CSV",
-        data=csv_results,
+        # Encoded only when the button is clicked, not on every slider change
+        # (callable data needs streamlit 1.52, see requirements.txt)
+        data=lambda: result_rows(upload, results, slice(None)).to_csv(index=False),
         file_name="topsis_results.csv",
         mime="text/csv",
         use_container_width=True
     )
     
     # Email section
-    if results['email']:
+    if email:
         st.markdown("---")
         st.subheader("📧 Send Results via Email")
         
         if st.button("📧 Send Results to Email", use_container_width=True):
             try:
-                send_email_with_sendgrid(
-                    results['email'],
-                    df,
+                st.session_state.email_job = queue_email_with_sendgrid(
+                    email,
+                    result_rows(upload, results, slice(None)),
                     results['weights'],
                     results['impacts']
                 )
-                st.session_state.email_sent = True
-                st.success(f"✅ Results sent successfully to {results['email']}")
             except Exception as e:
                 st.error(f"❌ Failed to send email: {str(e)}")
                 st.info("📋 Setup Instructions:\n1. Get SendGrid API key: https://sendgrid.com\n2. Go to Streamlit Cloud Dashboard → App Settings → Secrets\n3. Add: `SENDGRID_API_KEY = 'SG.xxxxx'`\n4. Add: `SENDER_EMAIL = 'your@email.com'`\n\n**Important:** Verify your sender email in SendGrid first!")
+        
+        # Sending happens in the background; show the latest known state of the job
+        if st.session_state.email_job is not None:
+            job = email_job_status(st.session_state.email_job)
+            if job is None:
+                st.session_state.email_job = None
+            elif job['status'] == 'sent':
+                st.success(f"✅ Results sent successfully to {', '.join(job['recipients'])}")
+            elif job['status'] == 'failed':
+                st.error(f"❌ Failed to send email: {job['error']}")
+                st.info("📋 Setup Instructions:\n1. Get SendGrid API key: https://sendgrid.com\n2. Go to Streamlit Cloud Dashboard → App Settings → Secrets\n3. Add: `SENDGRID_API_KEY = 'SG.xxxxx'`\n4. Add: `SENDER_EMAIL = 'your@email.com'`\n\n**Important:** Verify your sender email in SendGrid first!")
+            else:
+                st.info(f"⏳ Email {job['status']} ({job['sent']}/{len(job['recipients'])} sent, {job['attempts']} attempts)")
+                st.button("🔄 Refresh status")
+    
+    # Stage timings of the run that produced these results
+    with st.expander("⏱️ Stage timings"):
+        profile = results['profile']
+        st.dataframe(
+            pd.DataFrame(profile['stages'])[['stage', 'wall_seconds', 'cpu_seconds']],
+            hide_index=True,
+            use_container_width=True
+        )
+        st.caption(f"Total {profile['total_wall_seconds'] * 1000:.1f} ms · {profile.get('rows', 0)} × {profile.get('criteria', 0)} {profile.get('dtype', '')} matrix")
     
     # Show statistics
     st.subheader("📈 Statistics")
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Best Score", f"{df['Topsis Score'].max():.4f}")
+        st.metric("Best Score", f"{results['score'].max():.4f}")
     with col2:
-        st.metric("Worst Score", f"{df['Topsis Score'].min():.4f}")
+        st.metric("Worst Score", f"{results['score'].min():.4f}")
     with col3:
-        st.metric("Average Score", f"{df['Topsis Score'].mean():.4f}")
+        st.metric("Average Score", f"{results['score'].mean():.4f}")
     
     # Show ranking
     st.subheader("🏆 Rankings")
-    ranking_df = df[['Alternative', 'Topsis Score', 'Rank']].sort_values('Rank')
-    for idx, row in ranking_df.iterrows():
-        medal = "🥇" if row['Rank'] == 1 else "🥈" if row['Rank'] == 2 else "🥉" if row['Rank'] == 3 else f"#{row['Rank']}"
-        st.write(f"{medal} **{row['Alternative']}** - Score: {row['Topsis Score']:.4f}")
+    sort_col, direction_col = st.columns([3, 1])
+    with sort_col:
+        sort_by = st.selectbox("Sort by", ['Rank', 'Alternative', 'Topsis Score'], key="rankings_sort")
+    with direction_col:
+        descending = st.checkbox("Descending", key="rankings_desc")
+    # Sorting and slicing happen on the server; only one page is sent to the browser
+    start, stop = page_controls(len(model), "rankings")
+    rows = sorted_rows(upload, results, sort_by, not descending, start, stop)
+    ranking_df = result_rows(upload, results, rows)[['Alternative', 'Topsis Score', 'Rank']]
+    ranking_df.insert(0, 'Medal', medal_labels(ranking_df['Rank']))
+    st.dataframe(
+        ranking_df,
+        hide_index=True,
+        use_container_width=True,
+        column_config={'Topsis Score': st.column_config.NumberColumn(format="%.4f")}
+    )
 
 st.markdown("---")
+cache = get_result_cache()
+st.caption(f"Result cache: {cache.hits} hits · {cache.misses} misses · {len(cache)} entries · {cache.used_bytes / 1024 / 1024:.1f} / {cache.max_bytes / 1024 / 1024:.0f} MB")
 st.markdown("""
     <div style="text-align: center; color: #888;">
         <p>TOPSIS Decision Support Tool | Powered by Streamlit</p>
@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from topsis_mrinank_102303235 import backends
+from topsis_mrinank_102303235.cli import compute_topsis
+
+# Largest allowed score difference from the float64 NumPy reference
+TOLERANCE = {"float64": 1e-12, "float32": 1e-6}
+SHAPES = [(1_000, 3), (70_000, 7), (2_000, 200)]
+
+
+def decision_matrix(rows, criteria):
+    rng = np.random.default_rng(102303235)
+    data_mat = rng.uniform(1, 100, size=(rows, criteria)).round(3)
+    # Duplicated rows and one row at the ideal solution cover ties and zero separations
+    data_mat[1::7] = data_mat[::7][:len(data_mat[1::7])]
+    data_mat[0] = data_mat.max(axis=0)
+    return data_mat
+
+
+@pytest.mark.parametrize("name", backends.available_backends())
+@pytest.mark.parametrize("dtype", ["float64", "float32"])
+@pytest.mark.parametrize("rows,criteria", SHAPES)
+def test_backend_matches_numpy(name, dtype, rows, criteria):
+    data_mat = decision_matrix(rows, criteria)
+    weights = np.array([1 + j % 3 for j in range(criteria)], dtype=float)
+    impacts = ["+", "-"] * (criteria // 2) + ["+"] * (criteria % 2)
+    reference = compute_topsis(data_mat, weights, impacts, backend="numpy")
+    score = compute_topsis(data_mat, weights, impacts, dtype=dtype, backend=name)
+    assert score.dtype == np.float64
+    assert np.abs(score - reference).max() <= TOLERANCE[dtype]
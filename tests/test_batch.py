@@ -0,0 +1,26 @@
+from topsis_mrinank_102303235 import batch, cli
+
+
+def write_inputs(tmp_path, count):
+    files = []
+    for k in range(count):
+        input_file = tmp_path / ("in%d.csv" % k)
+        rows = ["M%d,%d,%d,%d" % (i, (i + k) % 7 + 1, (i * 3) % 11 + 1, (i * 5) % 13 + 1) for i in range(30)]
+        input_file.write_text("Model,P1,P2,P3\n" + "\n".join(rows) + "\n")
+        files.append(str(input_file))
+    return files
+
+
+def test_no_cache_leaves_the_normalization_cache_alone(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("TOPSIS_CACHE_DIR", str(cache_dir))
+    # Past the small-file path, so the runs would otherwise read and write the cache
+    monkeypatch.setattr(cli, "FAST_PATH_MAX_BYTES", 0)
+    files = write_inputs(tmp_path, 2)
+    results = list(batch.run_batch(files, "1,2,1", "+,-,+", str(tmp_path / "out"), workers=1, use_cache=False))
+    assert [error for _, _, error, _ in results] == [None, None]
+    assert not cache_dir.exists() or not any(cache_dir.iterdir())
+    list(batch.run_batch(files, "1,2,1", "+,-,+", str(tmp_path / "cached"), workers=1))
+    assert any(cache_dir.iterdir())
+    for name in ("in0.csv", "in1.csv"):
+        assert (tmp_path / "out" / name).read_bytes() == (tmp_path / "cached" / name).read_bytes()
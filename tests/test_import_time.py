@@ -0,0 +1,35 @@
+import os
+import sys
+import time
+import subprocess
+
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Same default budget as `benchmarks/bench_topsis.py import-time`
+BUDGET_MS = 300
+REPEAT = 3
+PROBE = """
+import sys
+from topsis_mrinank_102303235.cli import run_topsis
+run_topsis(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4])
+print('pandas' in sys.modules)
+"""
+
+
+def test_small_run_skips_pandas_and_fits_budget(tmp_path):
+    rng = np.random.default_rng(102303235)
+    input_file = tmp_path / "input.csv"
+    output_file = tmp_path / "output.csv"
+    rows = [",".join(["A" + str(i + 1)] + [str(v) for v in rng.integers(1, 100, size=5)]) for i in range(100)]
+    input_file.write_text("Name,C1,C2,C3,C4,C5\n" + "\n".join(rows) + "\n")
+    env = dict(os.environ, PYTHONPATH=REPO + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-c", PROBE, str(input_file), "1,1,1,1,1", "+,+,-,+,-", str(output_file)],
+                             env=env, check=True, capture_output=True, text=True).stdout.split()
+        best = min(best, time.perf_counter() - start)
+        assert out[-1] == "False", "pandas was imported for a small CSV run"
+    assert output_file.exists()
+    assert best * 1000 <= BUDGET_MS, f"CLI start-up took {best * 1000:.0f} ms (budget {BUDGET_MS} ms)"
@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+
+from topsis_mrinank_102303235.cli import DataError, ImpactsError
+from topsis_mrinank_102303235.model import TopsisModel
+
+
+@pytest.mark.parametrize("matrix", [[["a", "b"], ["c", "d"]], [[1, 2], [3]]])
+def test_non_numeric_or_ragged_matrix_is_a_data_error(matrix):
+    with pytest.raises(DataError, match="numeric matrix"):
+        TopsisModel().fit(matrix)
+
+
+def test_impact_sequences_accept_ve_suffix_like_the_cli():
+    model = TopsisModel().fit([[250, 16, 12], [200, 16, 8], [300, 32, 16]])
+    expected = model.score("1,1,1", "+ve,-ve,+")
+    assert np.array_equal(model.score([1, 1, 1], ["+ve", "-VE", "+"]), expected)
+    assert np.array_equal(model.score([1, 1, 1], ["+", "-", "+"]), expected)
+    with pytest.raises(ImpactsError):
+        model.score([1, 1, 1], ["+", "x", "-"])
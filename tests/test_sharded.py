@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from topsis_mrinank_102303235 import sharded
+from topsis_mrinank_102303235.cli import DataError, run_topsis
+
+HEADER = "Model,P1,P2,P3\n"
+
+
+def write_rows(path, rows):
+    path.write_text(HEADER + "".join("M%d,%d,%d,%d\n" % (i, i % 7 + 1, (i * 3) % 11 + 1, (i * 5) % 13 + 1) for i in rows))
+
+
+def test_empty_shard_goes_through_every_step(tmp_path):
+    write_rows(tmp_path / "all.csv", range(30))
+    write_rows(tmp_path / "s1.csv", range(0, 20))
+    write_rows(tmp_path / "s2.csv", [])
+    write_rows(tmp_path / "s3.csv", range(20, 30))
+    shards = ["s1", "s2", "s3"]
+    for name in shards:
+        sharded.main("stats", [str(tmp_path / (name + ".csv")), str(tmp_path / (name + ".json")), "--chunksize", "4"])
+    assert sharded.read_json(str(tmp_path / "s2.json"))["rows"] == 0
+    sharded.main("merge", ["1,2,1", "+,-,+", str(tmp_path / "model.json")] + [str(tmp_path / (n + ".json")) for n in shards])
+    for name in shards:
+        sharded.main("score", [str(tmp_path / "model.json"), str(tmp_path / (name + ".csv")), str(tmp_path / (name + "_scored.csv"))])
+    sharded.main("rank", [str(tmp_path / (n + "_scored.csv")) for n in shards])
+
+    run_topsis(str(tmp_path / "all.csv"), "1,2,1", "+,-,+", str(tmp_path / "expected.csv"), use_cache=False)
+    expected = pd.read_csv(tmp_path / "expected.csv")
+    parts = [pd.read_csv(tmp_path / (n + "_scored.csv")) for n in shards]
+    assert len(parts[1]) == 0 and list(parts[1].columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(pd.concat([parts[0], parts[2]], ignore_index=True), expected)
+
+
+def test_merge_of_only_empty_shards_is_a_clean_error(tmp_path):
+    write_rows(tmp_path / "s.csv", [])
+    sharded.main("stats", [str(tmp_path / "s.csv"), str(tmp_path / "s.json")])
+    with pytest.raises(DataError, match="no alternatives"):
+        sharded.main("merge", ["1,1,1", "+,+,+", str(tmp_path / "model.json"), str(tmp_path / "s.json")])
@@ -0,0 +1,21 @@
+import pytest
+
+from topsis_mrinank_102303235.cli import DataError, run_topsis
+
+
+def test_header_only_csv_is_a_clean_error_when_streamed(tmp_path):
+    input_file = tmp_path / "h.csv"
+    input_file.write_text("N,a,b\n")
+    with pytest.raises(DataError, match="no alternatives"):
+        run_topsis(str(input_file), "1,1", "+,+", str(tmp_path / "o.csv"), chunksize=5)
+    with pytest.raises(DataError, match="no alternatives"):
+        run_topsis(str(input_file), "1,1", "+,+", str(tmp_path / "o.csv"), use_cache=False)
+
+
+def test_streamed_output_matches_in_memory_run(tmp_path):
+    input_file = tmp_path / "data.csv"
+    rows = ["M%d,%d,%d,%d" % (i, i % 7 + 1, (i * 3) % 11 + 1, (i * 5) % 13 + 1) for i in range(50)]
+    input_file.write_text("Model,P1,P2,P3\n" + "\n".join(rows) + "\n")
+    run_topsis(str(input_file), "1,2,1", "+,-,+", str(tmp_path / "memory.csv"), use_cache=False)
+    run_topsis(str(input_file), "1,2,1", "+,-,+", str(tmp_path / "streamed.csv"), chunksize=7)
+    assert (tmp_path / "streamed.csv").read_bytes() == (tmp_path / "memory.csv").read_bytes()
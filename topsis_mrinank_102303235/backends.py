@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import numpy as np
+
+# Scoring backends for compute_topsis. Each loader imports its optional dependency
+# and returns kernel(data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype),
+# which returns float64 scores (0 where the separations are both zero), or raises
+# ImportError when the dependency is not installed. 'numpy' is the reference.
+# Kernels may also take workers=N (threads to use); it is only passed when given.
+BACKENDS = {}
+# Below this many cells numpy wins once the import of an optional backend is counted
+AUTOTUNE_MIN_CELLS = 4_000_000
+AUTOTUNE_SAMPLE_ROWS = 16384
+AUTOTUNE_REPEAT = 3
+
+_kernels = {}
+_choices = {}
+
+def register_backend(name, loader):
+    BACKENDS[name] = loader
+    _kernels.pop(name, None)
+    _choices.clear()
+    return loader
+
+def load_backend(name):
+    # The kernel, or None when the backend's dependency is missing
+    if name not in _kernels:
+        try:
+            _kernels[name] = BACKENDS[name]()
+        except ImportError:
+            _kernels[name] = None
+    return _kernels[name]
+
+def available_backends():
+    return [name for name in BACKENDS if load_backend(name) is not None]
+
+def load_numpy():
+    from topsis_mrinank_102303235.cli import score_rows
+    return score_rows
+
+def load_numexpr():
+    import numexpr as ne
+    from topsis_mrinank_102303235.cli import BLOCK_ROWS
+
+    def kernel(data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype=np.float64, workers=None):
+        # Column by column over row blocks: every numexpr call is one fused,
+        # multi-threaded pass over a contiguous slice of the block
+        if workers is not None:
+            previous = ne.set_num_threads(max(1, min(workers, ne.MAX_THREADS)))
+            try:
+                return kernel(data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype)
+            finally:
+                ne.set_num_threads(previous)
+        dtype = np.dtype(dtype)
+        score = np.empty(data_mat.shape[0])
+        rows = min(BLOCK_ROWS, data_mat.shape[0])
+        v = np.empty(rows, dtype=dtype)
+        s_pos = np.empty(rows, dtype=dtype)
+        s_neg = np.empty(rows, dtype=dtype)
+        for start in range(0, data_mat.shape[0], BLOCK_ROWS):
+            block = np.asfortranarray(data_mat[start:start + BLOCK_ROWS], dtype=dtype)
+            k = len(block)
+            sp, sn = s_pos[:k], s_neg[:k]
+            sp[:] = 0
+            sn[:] = 0
+            for j in range(block.shape[1]):
+                x = block[:, j]
+                n, w = dtype.type(norm_denom[j]), dtype.type(weights[j])
+                b, c = dtype.type(ideal_best[j]), dtype.type(ideal_worst[j])
+                ne.evaluate('x / n * w', out=v[:k], casting='same_kind')
+                vk = v[:k]
+                ne.evaluate('sp + (vk - b) ** 2', out=sp, casting='same_kind')
+                ne.evaluate('sn + (vk - c) ** 2', out=sn, casting='same_kind')
+            ne.evaluate('sqrt(sp)', out=sp, casting='same_kind')
+            ne.evaluate('sqrt(sn)', out=sn, casting='same_kind')
+            score[start:start + k] = ne.evaluate('where(sp + sn > 0, sn / (sp + sn), 0)')
+        return score
+
+    return kernel
+
+def load_numba():
+    import numba
+
+    # Compiled up front for read-only data in any memory layout (float32 or float64
+    # data and parameters), so slices, memmaps and C/F-ordered inputs never recompile
+    from numba import types
+    signatures = [types.void(types.Array(data, 2, 'A', readonly=True), *[types.Array(param, 1, 'A')] * 4,
+                             types.Array(types.float64, 1, 'C'))
+                  for data in (types.float64, types.float32) for param in (types.float64, types.float32)]
+
+    @numba.njit(signatures, parallel=True, cache=True)
+    def fused(data_mat, norm_denom, weights, ideal_best, ideal_worst, score):
+        # One pass per row: normalize, weight and both separations without temporaries
+        for i in numba.prange(data_mat.shape[0]):
+            s_pos = 0.0
+            s_neg = 0.0
+            for j in range(data_mat.shape[1]):
+                v = data_mat[i, j] / norm_denom[j] * weights[j]
+                d = v - ideal_best[j]
+                s_pos += d * d
+                d = v - ideal_worst[j]
+                s_neg += d * d
+            s_pos = np.sqrt(s_pos)
+            s_neg = np.sqrt(s_neg)
+            total = s_pos + s_neg
+            score[i] = s_neg / total if total > 0 else 0.0
+
+    def kernel(data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype=np.float64, workers=None):
+        dtype = np.dtype(dtype)
+        score = np.empty(data_mat.shape[0])
+        if data_mat.dtype not in (np.float32, np.float64):
+            data_mat = data_mat.astype(dtype)
+        data_mat = data_mat.view()
+        data_mat.flags.writeable = False
+        # numba's thread count is per calling thread and capped by its pool size
+        previous = numba.get_num_threads()
+        if workers is not None:
+            numba.set_num_threads(max(1, min(workers, numba.config.NUMBA_NUM_THREADS)))
+        try:
+            fused(data_mat, np.asarray(norm_denom, dtype=dtype),
+                  np.asarray(weights, dtype=dtype), np.asarray(ideal_best, dtype=dtype),
+                  np.asarray(ideal_worst, dtype=dtype), score)
+        finally:
+            numba.set_num_threads(previous)
+        return score
+
+    return kernel
+
+register_backend('numpy', load_numpy)
+register_backend('numexpr', load_numexpr)
+register_backend('numba', load_numba)
+
+def choices_file():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.environ.get('TOPSIS_BACKEND_CACHE', os.path.join(cache_home, 'topsis', 'backends.json'))
+
+def read_choices():
+    try:
+        with open(choices_file()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_choice(key, name):
+    # Best effort: a read-only home directory only means tuning again next time
+    choices = read_choices()
+    choices[key] = name
+    try:
+        os.makedirs(os.path.dirname(choices_file()), exist_ok=True)
+        with open(choices_file(), 'w') as f:
+            json.dump(choices, f, indent=2, sort_keys=True)
+    except OSError:
+        pass
+
+def shape_key(data_mat, dtype):
+    # Power-of-two buckets of rows and criteria, plus dtype and memory layout
+    rows, criteria = data_mat.shape
+    layout = 'F' if data_mat.flags.f_contiguous and not data_mat.flags.c_contiguous else 'C'
+    return '%d-%d-%s-%s' % (rows.bit_length(), criteria.bit_length(), np.dtype(dtype).name, layout)
+
+def autotune(data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype=np.float64):
+    # Picks the fastest available backend for matrices of this shape by timing
+    # each one on the leading rows; the choice is kept in memory and on disk.
+    # Small matrices always use numpy, so the optional imports are skipped too
+    if data_mat.size < AUTOTUNE_MIN_CELLS:
+        return 'numpy'
+    key = shape_key(data_mat, dtype)
+    if key in _choices:
+        return _choices[key]
+    name = read_choices().get(key)
+    if name not in BACKENDS or load_backend(name) is None:
+        sample = data_mat[:AUTOTUNE_SAMPLE_ROWS]
+        timings = {}
+        for candidate in available_backends():
+            kernel = load_backend(candidate)
+            kernel(sample[:16], norm_denom, weights, ideal_best, ideal_worst, dtype)  # warm up
+            best = float('inf')
+            for _ in range(AUTOTUNE_REPEAT):
+                start = time.perf_counter()
+                kernel(sample, norm_denom, weights, ideal_best, ideal_worst, dtype)
+                best = min(best, time.perf_counter() - start)
+            timings[candidate] = best
+        name = min(timings, key=timings.get)
+        if len(timings) > 1:
+            save_choice(key, name)
+    _choices[key] = name
+    return name
+
+def score_with_backend(backend, data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype=np.float64, workers=None):
+    if backend == 'auto':
+        backend = os.environ.get('TOPSIS_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = autotune(data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype)
+    if backend not in BACKENDS:
+        from topsis_mrinank_102303235.cli import error_and_exit
+        error_and_exit("Unknown backend: " + backend + " (choose from auto, " + ", ".join(BACKENDS) + ")")
+    kernel = load_backend(backend)
+    if kernel is None:
+        from topsis_mrinank_102303235.cli import error_and_exit
+        error_and_exit("Backend " + backend + " is not available; install " + backend + " to use it")
+    if workers is None:
+        return kernel(data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype)
+    return kernel(data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype, workers=workers)
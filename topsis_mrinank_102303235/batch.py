@@ -0,0 +1,102 @@
+import os
+import sys
+import glob
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+
+from topsis_mrinank_102303235.cli import (
+    TopsisError,
+    error_and_exit,
+    parse_weights,
+    parse_impacts,
+    parse_positive_int,
+    pop_option,
+    pop_flag,
+    run_topsis,
+)
+
+USAGE = """Usage: topsis batch <InputPattern> [<InputPattern> ...] --weights W --impacts I --out-dir DIR [--workers N] [--chunksize N] [--no-cache]"""
+
+def expand_inputs(patterns):
+    files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            error_and_exit("No input files match " + pattern)
+        files.extend(f for f in matches if f not in files)
+    return files
+
+def output_files(input_files, out_dir):
+    outputs = [os.path.join(out_dir, os.path.basename(f)) for f in input_files]
+    seen = {}
+    for input_file, output_file in zip(input_files, outputs):
+        if output_file in seen:
+            error_and_exit("Input files " + seen[output_file] + " and " + input_file + " would write the same result file")
+        seen[output_file] = input_file
+    return outputs
+
+def score_file(job):
+    # Runs in a worker process; failures are returned so the other files still get scored
+    input_file, output_file, weights_str, impacts_str, chunksize, use_cache = job
+    start = time.perf_counter()
+    error = None
+    try:
+        with contextlib.redirect_stdout(None):
+            run_topsis(input_file, weights_str, impacts_str, output_file, chunksize, use_cache=use_cache)
+    except TopsisError as e:
+        error = str(e)
+    except Exception as e:
+        error = type(e).__name__ + ": " + str(e)
+    return input_file, output_file, error, time.perf_counter() - start
+
+def run_batch(input_files, weights_str, impacts_str, out_dir, workers=None, chunksize=None, use_cache=True):
+    # Weights and impacts are checked once up front instead of failing every file
+    parse_weights(weights_str)
+    parse_impacts(impacts_str)
+    try:
+        os.makedirs(out_dir, exist_ok=True)
+    except OSError as e:
+        error_and_exit("Failed to create output directory: " + str(e))
+    jobs = [(f, out, weights_str, impacts_str, chunksize, use_cache) for f, out in zip(input_files, output_files(input_files, out_dir))]
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) or 1
+    if workers == 1:
+        yield from map(score_file, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(score_file, jobs)
+
+def main(args):
+    args = list(args)
+    weights_str = pop_option(args, '--weights')
+    impacts_str = pop_option(args, '--impacts')
+    out_dir = pop_option(args, '--out-dir')
+    workers = pop_option(args, '--workers')
+    chunksize = pop_option(args, '--chunksize')
+    use_cache = not pop_flag(args, '--no-cache')
+    if not args or weights_str is None or impacts_str is None or out_dir is None:
+        print(USAGE)
+        sys.exit(1)
+    workers = None if workers is None else parse_positive_int(workers, "--workers")
+    chunksize = None if chunksize is None else parse_positive_int(chunksize, "--chunksize")
+    input_files = expand_inputs(args)
+    start = time.perf_counter()
+    failures = []
+    total_bytes = 0
+    for input_file, output_file, error, seconds in run_batch(input_files, weights_str, impacts_str, out_dir, workers, chunksize, use_cache):
+        if error is None:
+            total_bytes += os.path.getsize(input_file)
+            print("ok    ", input_file, "->", output_file, "(%.3f s)" % seconds)
+        else:
+            failures.append((input_file, error))
+            print("failed", input_file + ":", error)
+    elapsed = time.perf_counter() - start
+    done = len(input_files) - len(failures)
+    print("Scored %d of %d files in %.2f s (%.1f files/s, %.1f MB/s)" % (
+        done, len(input_files), elapsed, done / elapsed if elapsed else 0.0,
+        total_bytes / 2**20 / elapsed if elapsed else 0.0))
+    if failures:
+        print(len(failures), "file(s) failed:")
+        for input_file, error in failures:
+            print("  " + input_file + ": " + error)
+        sys.exit(1)
@@ -0,0 +1,203 @@
+import os
+import json
+import shutil
+import pickle
+import hashlib
+import tempfile
+import time
+import numpy as np
+
+from topsis_mrinank_102303235.cli import (
+    BLOCK_ROWS,
+    as_float_matrix,
+)
+from topsis_mrinank_102303235.profiling import stage
+
+# Normalized inputs of earlier runs, so a run with new weights or impacts skips
+# parsing and normalization. Each entry is a directory named after the content
+# hash of the input file, holding meta.json (fingerprint, column norms and
+# min/max), norm.npy (the normalized matrix, memory-mapped when read back) and
+# frame.pkl (the parsed input frame, for writing the result).
+CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+HASH_BLOCK_BYTES = 1024 * 1024
+# Leftovers of runs that died while storing an entry
+STALE_TMP_SECONDS = 3600
+
+def cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.environ.get('TOPSIS_CACHE_DIR', os.path.join(cache_home, 'topsis', 'normalized'))
+
+def max_bytes():
+    try:
+        return int(os.environ.get('TOPSIS_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+    except ValueError:
+        return DEFAULT_MAX_BYTES
+
+def fingerprint(filename):
+    st = os.stat(filename)
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return {'hash': digest.hexdigest(), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns,
+            'source': os.path.realpath(filename)}
+
+def pandas_version():
+    # frame.pkl is only read back by the pandas version that wrote it
+    import pandas as pd
+    return pd.__version__
+
+class CachedInput:
+    """A cache entry: the input frame, its normalized matrix and the column statistics"""
+
+    def __init__(self, path, meta, frame, norm_mat):
+        self.path = path
+        self.meta = meta
+        self.frame = frame
+        # Mapped when the entry is opened, so it stays readable even if another
+        # run evicts or replaces the entry's files afterwards
+        self.norm_mat = norm_mat
+        self.norm_denom = np.array(meta['norm_denom'])
+        self.col_min = np.array(meta['col_min'])
+        self.col_max = np.array(meta['col_max'])
+
+    @property
+    def norm_range(self):
+        # Dividing by a positive norm keeps the order, so these are exactly the
+        # column min/max of norm_mat
+        return self.col_min / self.norm_denom, self.col_max / self.norm_denom
+
+    def model(self, backend='auto', workers=None):
+        from topsis_mrinank_102303235.model import TopsisModel
+        return TopsisModel.from_normalized(self.norm_mat, self.norm_denom, self.col_min, self.col_max, backend, workers)
+
+def is_valid(meta, fp):
+    return (meta is not None and meta.get('version') == CACHE_VERSION and meta.get('size') == fp['size']
+            and meta.get('pandas') == pandas_version())
+
+def open_entry(path, meta, frame=None):
+    # The entry with its matrix mapped (and its frame loaded unless given), or None
+    # when its files are missing or unreadable
+    try:
+        norm_mat = np.load(os.path.join(path, 'norm.npy'), mmap_mode='r')
+        if tuple(norm_mat.shape) != tuple(meta['shape']):
+            return None
+        if frame is None:
+            with open(os.path.join(path, 'frame.pkl'), 'rb') as f:
+                frame = pickle.load(f)
+    except Exception:
+        return None
+    return CachedInput(path, meta, frame, norm_mat)
+
+def read_meta(path):
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def lookup(filename):
+    # (entry, fingerprint); entry is None on a miss, fingerprint is None when the
+    # file cannot be read (the normal reader then reports the error)
+    try:
+        fp = fingerprint(filename)
+    except OSError:
+        return None, None
+    path = os.path.join(cache_dir(), fp['hash'])
+    meta = read_meta(path)
+    if not is_valid(meta, fp):
+        return None, fp
+    entry = open_entry(path, meta)
+    if entry is None:
+        # Evicted by another run meanwhile, or unreadable: scored from the input again
+        return None, fp
+    try:
+        # meta.json's mtime is the entry's last use, for eviction
+        os.utime(os.path.join(path, 'meta.json'))
+    except OSError:
+        pass
+    return entry, fp
+
+def store(filename, fp, df, data_mat):
+    # Normalizes data_mat straight into a new entry and returns it, or None when
+    # the entry cannot be written, would exceed the size cap, or the input file
+    # changed while it was being read
+    from topsis_mrinank_102303235.model import TopsisModel
+    data_mat = as_float_matrix(data_mat)
+    if data_mat.shape[0] * data_mat.shape[1] * 8 > max_bytes():
+        return None
+    # Validates the matrix and gives its norms and min/max
+    model = TopsisModel().fit(data_mat)
+    root = cache_dir()
+    try:
+        os.makedirs(root, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.tmp-', dir=root)
+    except OSError:
+        return None
+    try:
+        with stage('cache_store'):
+            norm_mat = np.lib.format.open_memmap(os.path.join(tmp, 'norm.npy'), mode='w+',
+                                                 dtype=np.float64, shape=data_mat.shape)
+            for start in range(0, data_mat.shape[0], BLOCK_ROWS):
+                np.divide(data_mat[start:start + BLOCK_ROWS], model.norm_denom, out=norm_mat[start:start + BLOCK_ROWS])
+            norm_mat.flush()
+            del norm_mat
+            with open(os.path.join(tmp, 'frame.pkl'), 'wb') as f:
+                pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+            st = os.stat(filename)
+            if (st.st_size, st.st_mtime_ns) != (fp['size'], fp['mtime_ns']):
+                return None
+            meta = dict(fp, version=CACHE_VERSION, pandas=pandas_version(), shape=list(data_mat.shape),
+                        norm_denom=model.norm_denom.tolist(), col_min=model.col_min.tolist(),
+                        col_max=model.col_max.tolist())
+            with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            path = os.path.join(root, fp['hash'])
+            # A valid entry stored by another run meanwhile is kept (it may be in
+            # use); only a stale one is replaced
+            if not is_valid(read_meta(path), fp):
+                shutil.rmtree(path, ignore_errors=True)
+                try:
+                    os.rename(tmp, path)
+                except OSError:
+                    # Another run stored the same input first
+                    pass
+            evict(root, fp)
+        meta = read_meta(path)
+        return open_entry(path, meta, df) if meta is not None else None
+    except OSError:
+        return None
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def entry_bytes(path):
+    total = 0
+    for name in os.listdir(path):
+        total += os.path.getsize(os.path.join(path, name))
+    return total
+
+def evict(root, fp=None):
+    # Drops entries of older contents of the same input file, then the least
+    # recently used entries until the cache fits in max_bytes()
+    entries = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if name.startswith('.tmp-'):
+                if os.path.getmtime(path) < time.time() - STALE_TMP_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+                continue
+            meta = read_meta(path)
+            if meta is None or (fp is not None and meta.get('source') == fp['source'] and name != fp['hash']):
+                shutil.rmtree(path, ignore_errors=True)
+                continue
+            entries.append((os.path.getmtime(os.path.join(path, 'meta.json')), entry_bytes(path), path))
+        except OSError:
+            continue
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes():
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
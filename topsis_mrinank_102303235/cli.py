@@ -1,106 +1,851 @@
 import sys
 import os
-import pandas as pd
+import re
+import csv
 import numpy as np
 
-def error_and_exit(msg):
-    print("Error:", msg)
-    sys.exit(1)
+if not __package__:
+    # Run as a script (python topsis_mrinank_102303235/cli.py ...): make the package
+    # importable from the checkout it lives in
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from topsis_mrinank_102303235.profiling import stage
+from topsis_mrinank_102303235.backends import score_with_backend
+
+BLOCK_ROWS = 65536
+BATCH_BLOCK_BYTES = 256 * 1024
+BATCH_MIN_ROWS = 256
+# From here on rank_rounded counts instead of sorting
+RANK_COUNT_MIN_ROWS = 65536
+SHARD_COMMANDS = ('stats', 'merge', 'score', 'rank')
+
+# Small purely numeric CSVs are handled with the csv module and NumPy, without importing pandas
+FAST_PATH_MAX_BYTES = 1024 * 1024
+INT_TOKEN = re.compile(r'[+-]?\d{1,18}\Z')
+FLOAT_TOKEN = re.compile(r'[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\Z')
+# Strings pandas would read as missing values or booleans
+PANDAS_SPECIAL = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                  '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+                  'True', 'TRUE', 'true', 'False', 'FALSE', 'false'}
+
+USAGE = ("Usage: python topsis.py <InputDataFile> <Weights(comma separated)> <Impacts(comma separated)> <ResultFileName> [--chunksize N] [--top K] [--group-by COLUMN] [--backend NAME] [--threads N] [--scores-only] [--no-cache] [--profile FILE|-]\n"
+         "       python topsis.py <InputDataFile> <Impacts(comma separated)> <ResultFileName> --weights-file <ScenariosFile> [--scores-only] [--no-cache] [--profile FILE|-]\n"
+         "       python topsis.py stats|merge|score|rank ...  (sharded workflow, run a subcommand without arguments for help)\n"
+         "       python topsis.py batch <InputPattern> [<InputPattern> ...] --weights W --impacts I --out-dir DIR [--workers N] [--no-cache]\n"
+         "       python topsis.py smaa <InputDataFile> <Impacts(comma separated)> <ResultFileName> [--samples N] [--seed S] ...  (weight uncertainty, run without arguments for help)\n"
+         "       python topsis.py serve <Name>=<InputDataFile> [...] [--port PORT]  (scoring server, run without arguments for help)")
+
+class TopsisError(Exception):
+    pass
+
+class InputFileError(TopsisError):
+    """The input file is missing, unreadable or has too few columns"""
+
+class DataError(TopsisError, ValueError):
+    """The decision matrix is not numeric, or a criterion column cannot be normalized"""
+
+class WeightsError(TopsisError, ValueError):
+    """Weights are not numeric or do not match the criteria columns"""
+
+class ImpactsError(TopsisError, ValueError):
+    """Impacts are not + or -, or do not match the criteria columns"""
+
+def error_and_exit(msg, error=TopsisError):
+    # Library code raises; main() turns the error into a message and exit status 1,
+    # so callers such as the batch mode can keep going after a bad file
+    raise error(msg)
 
 def parse_weights(wstr):
     parts = [p.strip() for p in wstr.split(',')]
     if len(parts) == 0:
-        error_and_exit("Weights must be comma separated values")
+        error_and_exit("Weights must be comma separated values", WeightsError)
     weights = []
     for p in parts:
         try:
             weights.append(float(p))
         except:
-            error_and_exit("Weights must be numeric and comma separated")
+            error_and_exit("Weights must be numeric and comma separated", WeightsError)
     return np.array(weights, dtype=float)
 
 def parse_impacts(istr):
     parts = [p.strip() for p in istr.split(',')]
     if len(parts) == 0:
-        error_and_exit("Impacts must be comma separated values")
+        error_and_exit("Impacts must be comma separated values", ImpactsError)
     impacts = []
     for p in parts:
         if p == '':
-            error_and_exit("Impacts contain empty value")
+            error_and_exit("Impacts contain empty value", ImpactsError)
         first = p[0]
         if first not in ['+','-']:
             if p.lower().startswith('+ve') or p.lower().startswith('-ve'):
                 first = p[0]
             else:
-                error_and_exit("Impacts must be either + or - (or +ve / -ve)")
+                error_and_exit("Impacts must be either + or - (or +ve / -ve)", ImpactsError)
         impacts.append(first)
     return impacts
 
+def as_weights(weights):
+    # The CLI's comma separated string or a sequence of numbers, as a float array
+    if isinstance(weights, str):
+        return parse_weights(weights)
+    try:
+        return np.asarray(weights, dtype=float).ravel()
+    except (TypeError, ValueError):
+        error_and_exit("Weights must be numeric", WeightsError)
+
+def as_impacts(impacts):
+    # The CLI's comma separated string or a sequence of '+'/'-', as a list
+    if isinstance(impacts, str):
+        return parse_impacts(impacts)
+    # '+ve' / '-ve' are accepted as in the CLI string
+    impacts = [str(i).strip() for i in impacts]
+    if any(i.lower() not in ('+', '-', '+ve', '-ve') for i in impacts):
+        error_and_exit("Impacts must be either + or - (or +ve / -ve)", ImpactsError)
+    return [i[0] for i in impacts]
+
 def read_and_validate_csv(filename):
+    import pandas as pd
     if not os.path.isfile(filename):
-        error_and_exit("File not found: " + filename)
+        error_and_exit("File not found: " + filename, InputFileError)
     try:
         df = pd.read_csv(filename)
     except Exception as e:
-        error_and_exit("Failed to read CSV file: " + str(e))
+        error_and_exit("Failed to read CSV file: " + str(e), InputFileError)
     if df.shape[1] < 3:
-        error_and_exit("Input file must contain three or more columns")
+        error_and_exit("Input file must contain three or more columns", InputFileError)
     return df
 
+def read_csv_header(filename):
+    import pandas as pd
+    if not os.path.isfile(filename):
+        error_and_exit("File not found: " + filename, InputFileError)
+    try:
+        columns = pd.read_csv(filename, nrows=0).columns
+    except Exception as e:
+        error_and_exit("Failed to read CSV file: " + str(e), InputFileError)
+    if len(columns) < 3:
+        error_and_exit("Input file must contain three or more columns", InputFileError)
+    return columns
+
+def read_csv_chunks(filename, chunksize, **kwargs):
+    import pandas as pd
+    try:
+        reader = pd.read_csv(filename, chunksize=chunksize, **kwargs)
+        for chunk in reader:
+            yield chunk
+    except Exception as e:
+        error_and_exit("Failed to read CSV file: " + str(e), InputFileError)
+
 def ensure_numeric(df, cols):
-    sub = df.iloc[:, cols].apply(pd.to_numeric, errors='coerce')
-    if sub.isnull().any().any():
-        error_and_exit("Non-numeric data found in criteria columns")
-    return sub.astype(float)
+    # Numeric columns are copied straight into one float64 matrix; only the other
+    # columns go through pd.to_numeric. A single isfinite scan then finds bad cells
+    # (missing, non-numeric or infinite).
+    import pandas as pd
+    sub = df.iloc[:, cols]
+    values = np.empty(sub.shape, order='F')
+    for j in range(sub.shape[1]):
+        col = sub.iloc[:, j]
+        if col.dtype.kind not in 'biuf':
+            col = pd.to_numeric(col, errors='coerce')
+        values[:, j] = col.to_numpy(dtype=float, na_value=np.nan)
+    bad = ~np.isfinite(values)
+    if bad.any():
+        j = int(bad.any(axis=0).argmax())
+        i = int(bad[:, j].argmax())
+        label = sub.index[i]
+        row = label + 1 if isinstance(label, (int, np.integer)) else label
+        where = "column '" + str(sub.columns[j]) + "', row " + str(row)
+        if np.isinf(values[i, j]):
+            error_and_exit("Infinite value found in criteria columns: " + where, DataError)
+        value = sub.iat[i, j]
+        value = "empty value" if pd.isna(value) else repr(value)
+        error_and_exit("Non-numeric data found in criteria columns: column '" + str(sub.columns[j]) + "', row " + str(row) + " (" + value + ")", DataError)
+    return pd.DataFrame(values, index=sub.index, columns=sub.columns, copy=False)
+
+def as_float_matrix(data_mat, dtype=np.float64):
+    # Ragged rows or non-numeric values are a DataError, not numpy's ValueError
+    try:
+        data_mat = np.asarray(data_mat)
+        if data_mat.dtype.kind != 'f':
+            data_mat = data_mat.astype(dtype)
+    except (TypeError, ValueError):
+        error_and_exit("Decision matrix must be a numeric matrix with the same number of values in every row", DataError)
+    return data_mat
 
-def compute_topsis(data_mat, weights, impacts):
-    norm_denom = np.sqrt((data_mat ** 2).sum(axis=0))
+def row_spans(num_rows, workers=None):
+    # Up to `workers` contiguous (start, stop) row ranges that only split the rows
+    # at BLOCK_ROWS boundaries, so every block is computed the same way whatever
+    # the number of workers
+    num_blocks = -(-num_rows // BLOCK_ROWS)
+    workers = max(1, min(workers or 1, num_blocks))
+    bounds = [min(i * num_blocks // workers * BLOCK_ROWS, num_rows) for i in range(workers + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def run_spans(func, num_rows, workers=None):
+    # func(start, stop) for every span of row_spans(), on a thread pool when there
+    # is more than one; NumPy releases the GIL inside the ufuncs and reductions.
+    # Results come back in row order
+    spans = row_spans(num_rows, workers)
+    if len(spans) == 1:
+        return [func(*spans[0])]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(len(spans)) as pool:
+        return list(pool.map(lambda span: func(*span), spans))
+
+def column_sumsq(data_mat, out=None, workers=None):
+    # Blocks are summed into their own partial sums (in parallel with workers > 1),
+    # which are then added to out in row order, so the result does not depend on
+    # the number of workers
+    if out is None:
+        out = np.zeros(data_mat.shape[1])
+    partials = np.empty((-(-data_mat.shape[0] // BLOCK_ROWS), data_mat.shape[1]))
+
+    def sum_span(start, stop):
+        squares = np.empty((min(BLOCK_ROWS, stop - start), data_mat.shape[1]))
+        for block_start in range(start, stop, BLOCK_ROWS):
+            block = data_mat[block_start:min(block_start + BLOCK_ROWS, stop)]
+            sq = squares[:len(block)]
+            np.multiply(block, block, out=sq, dtype=np.float64)
+            sq.sum(axis=0, out=partials[block_start // BLOCK_ROWS])
+
+    run_spans(sum_span, data_mat.shape[0], workers)
+    for partial in partials:
+        out += partial
+    return out
+
+def column_range(data_mat, workers=None):
+    # Column min and max; both are exact, so splitting the rows changes nothing
+    parts = run_spans(lambda start, stop: (data_mat[start:stop].min(axis=0), data_mat[start:stop].max(axis=0)),
+                      data_mat.shape[0], workers)
+    return np.minimum.reduce([low for low, _ in parts]), np.maximum.reduce([high for _, high in parts])
+
+def ideal_solutions(col_min, col_max, norm_denom, weights, impacts):
+    low = col_min / norm_denom * weights
+    high = col_max / norm_denom * weights
+    benefit = np.asarray(impacts) == '+'
+    ideal_best = np.where(benefit, np.maximum(low, high), np.minimum(low, high))
+    ideal_worst = np.where(benefit, np.minimum(low, high), np.maximum(low, high))
+    return ideal_best, ideal_worst
+
+def score_rows(data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype=np.float64, workers=None):
+    # Works on one BLOCK_ROWS buffer reused in place, so memory stays flat whatever
+    # the number of rows; with workers > 1 each thread scores its own span of rows
+    # with its own buffers into the shared output. With dtype=np.float32 the per-row pass runs in single
+    # precision (norms and ideals are still derived in float64); the absolute
+    # score error is then bounded by about (log2(criteria) + 8) * 2**-24, below
+    # 1e-6 for up to 256 criteria, so only the 6th rounded decimal can change.
+    dtype = np.dtype(dtype)
+    norm_denom = np.asarray(norm_denom, dtype=dtype)
+    weights = np.asarray(weights, dtype=dtype)
+    ideal_best = np.asarray(ideal_best, dtype=dtype)
+    ideal_worst = np.asarray(ideal_worst, dtype=dtype)
+    score = np.empty(data_mat.shape[0])
+
+    def score_span(start, stop):
+        rows = min(BLOCK_ROWS, stop - start)
+        weighted = np.empty((rows, data_mat.shape[1]), dtype=dtype)
+        diff = np.empty_like(weighted)
+        s_pos = np.empty(rows, dtype=dtype)
+        s_neg = np.empty(rows, dtype=dtype)
+        for block_start in range(start, stop, BLOCK_ROWS):
+            block = data_mat[block_start:min(block_start + BLOCK_ROWS, stop)]
+            k = len(block)
+            w, d, sp, sn = weighted[:k], diff[:k], s_pos[:k], s_neg[:k]
+            np.divide(block, norm_denom, out=w, casting='same_kind')
+            np.multiply(w, weights, out=w)
+            np.subtract(w, ideal_best, out=d)
+            np.multiply(d, d, out=d)
+            d.sum(axis=1, out=sp)
+            np.sqrt(sp, out=sp)
+            np.subtract(w, ideal_worst, out=d)
+            np.multiply(d, d, out=d)
+            d.sum(axis=1, out=sn)
+            np.sqrt(sn, out=sn)
+            np.add(sp, sn, out=sp)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.divide(sn, sp, out=score[block_start:block_start + k], casting='same_kind')
+
+    run_spans(score_span, data_mat.shape[0], workers)
+    return np.nan_to_num(score, copy=False)
+
+def compute_topsis(data_mat, weights, impacts, dtype=np.float64, groups=None, backend='auto', workers=None):
+    # groups (one integer code per row) scores every group as if it were its own input;
+    # backend picks the scoring kernel (see backends.py), 'auto' by matrix shape.
+    # workers=N runs the column reductions and the scoring pass on N threads over
+    # row blocks (N threads of its own pool for numexpr and numba); the scores are
+    # bit-identical for any N. Grouped scoring always runs on one thread
+    data_mat = as_float_matrix(data_mat, dtype)
+    if groups is not None:
+        return compute_topsis_grouped(data_mat, groups, weights, impacts)
+    with stage('normalize', rows=data_mat.shape[0], criteria=data_mat.shape[1], dtype=str(data_mat.dtype)):
+        norm_denom = norms_from_sumsq(column_sumsq(data_mat, workers=workers))
+        ideal_best, ideal_worst = ideal_solutions(*column_range(data_mat, workers), norm_denom, weights, impacts)
+    with stage('score'):
+        return score_with_backend(backend, data_mat, norm_denom, weights, ideal_best, ideal_worst, dtype, workers)
+
+def group_segments(groups):
+    # Stable sort by group code; rows of group g are order[starts[g]:starts[g + 1]]
+    groups = np.asarray(groups)
+    order = np.argsort(groups, kind='stable')
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    return order, starts[:len(groups)]
+
+def compute_topsis_grouped(data_mat, groups, weights, impacts):
+    # Segmented reductions (reduceat over the group-sorted rows) give per-group
+    # norms and ideals in one pass; rows are then scored blockwise against their
+    # group's values and scattered back to the input order
+    order, starts = group_segments(groups)
+    score = np.empty(data_mat.shape[0])
+    if not len(order):
+        return score
+    with stage('normalize', rows=data_mat.shape[0], criteria=data_mat.shape[1], dtype=str(data_mat.dtype), groups=len(starts)):
+        sorted_mat = data_mat[order]
+        sumsq = np.add.reduceat(np.square(sorted_mat, dtype=np.float64), starts, axis=0)
+        check_finite_sumsq(sumsq)
+        norm_denom = np.sqrt(sumsq)
+        if (norm_denom == 0).any():
+            error_and_exit("At least one criterion column has all zeros within a group; cannot normalize", DataError)
+        col_min = np.minimum.reduceat(sorted_mat, starts, axis=0)
+        col_max = np.maximum.reduceat(sorted_mat, starts, axis=0)
+        ideal_best, ideal_worst = ideal_solutions(col_min, col_max, norm_denom, weights, impacts)
+        group_of_row = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(order)]))
+    with stage('score'):
+        for start in range(0, len(order), BLOCK_ROWS):
+            g = group_of_row[start:start + BLOCK_ROWS]
+            weighted = sorted_mat[start:start + BLOCK_ROWS] / norm_denom[g] * weights
+            s_pos = np.sqrt(((weighted - ideal_best[g]) ** 2).sum(axis=1))
+            s_neg = np.sqrt(((weighted - ideal_worst[g]) ** 2).sum(axis=1))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                score[order[start:start + BLOCK_ROWS]] = s_neg / (s_pos + s_neg)
+    return np.nan_to_num(score, copy=False)
+
+def rank_within_groups(scores, groups):
+    # rank(method='max', ascending=False) inside each group: sort by (group, score),
+    # then rank = end of the group - first position of the score's tie run
+    scores = np.asarray(scores)
+    groups = np.asarray(groups)
+    ranks = np.empty(len(scores), dtype=np.int64)
+    if not len(scores):
+        return ranks
+    order = np.lexsort((scores, groups))
+    s, g = scores[order], groups[order]
+    new_group = np.r_[True, g[1:] != g[:-1]]
+    new_run = new_group | np.r_[True, s[1:] != s[:-1]]
+    positions = np.arange(len(order))
+    run_start = np.maximum.accumulate(np.where(new_run, positions, 0))
+    group_end = np.r_[np.flatnonzero(new_group)[1:], len(order)][np.cumsum(new_group) - 1]
+    ranks[order] = group_end - run_start
+    return ranks
+
+def normalize_matrix(data_mat):
+    data_mat = np.asarray(data_mat, dtype=float)
+    norm_denom = norms_from_sumsq(column_sumsq(data_mat))
+    return np.ascontiguousarray(data_mat / norm_denom)
+
+def score_normalized_batch(norm_mat, weight_mat, impacts, max_block_bytes=BATCH_BLOCK_BYTES, norm_range=None):
+    # norm_range: precomputed (column min, column max) of norm_mat, for callers that
+    # score the same matrix repeatedly
+    weight_mat = np.atleast_2d(np.asarray(weight_mat, dtype=float))
+    num_scenarios, num_criteria = weight_mat.shape
+    if num_criteria != norm_mat.shape[1]:
+        error_and_exit("Number of weights must be equal to number of criteria columns. Expected " + str(norm_mat.shape[1]), WeightsError)
+    benefit = np.broadcast_to(np.asarray(impacts) == '+', weight_mat.shape)
+    col_min, col_max = norm_range if norm_range is not None else (norm_mat.min(axis=0), norm_mat.max(axis=0))
+    low = col_min * weight_mat
+    high = col_max * weight_mat
+    ideal_best = np.where(benefit, np.maximum(low, high), np.minimum(low, high))[:, None, :]
+    ideal_worst = np.where(benefit, np.minimum(low, high), np.maximum(low, high))[:, None, :]
+    weight_mat = weight_mat[:, None, :]
+    scores = np.empty((num_scenarios, norm_mat.shape[0]))
+    # (scenarios x rows x criteria) buffers of about max_block_bytes, reused in place;
+    # small enough to stay in cache, which matters more than fewer, larger passes
+    step = max(1, min(num_scenarios, max_block_bytes // (BATCH_MIN_ROWS * num_criteria * 8)))
+    rows = max(BATCH_MIN_ROWS, min(BLOCK_ROWS, max_block_bytes // (step * num_criteria * 8)))
+    weighted = np.empty((step, rows, num_criteria))
+    diff = np.empty_like(weighted)
+    s_pos = np.empty((step, rows))
+    s_neg = np.empty_like(s_pos)
+    for start in range(0, norm_mat.shape[0], rows):
+        block = norm_mat[start:start + rows]
+        k = len(block)
+        for s0 in range(0, num_scenarios, step):
+            m = min(step, num_scenarios - s0)
+            w, d, sp, sn = weighted[:m, :k], diff[:m, :k], s_pos[:m, :k], s_neg[:m, :k]
+            np.multiply(block, weight_mat[s0:s0 + m], out=w)
+            np.subtract(w, ideal_best[s0:s0 + m], out=d)
+            np.multiply(d, d, out=d)
+            d.sum(axis=2, out=sp)
+            np.subtract(w, ideal_worst[s0:s0 + m], out=d)
+            np.multiply(d, d, out=d)
+            d.sum(axis=2, out=sn)
+            np.sqrt(sp, out=sp)
+            np.sqrt(sn, out=sn)
+            np.add(sp, sn, out=sp)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                np.divide(sn, sp, out=scores[s0:s0 + m, start:start + k])
+    return np.nan_to_num(scores, copy=False)
+
+def compute_topsis_batch(data_mat, weight_mat, impacts, max_block_bytes=BATCH_BLOCK_BYTES):
+    # One score row per weight scenario; impacts are shared or given per scenario
+    with stage('normalize', rows=data_mat.shape[0], criteria=data_mat.shape[1], dtype=str(data_mat.dtype)):
+        norm_mat = normalize_matrix(data_mat)
+    with stage('score', scenarios=len(np.atleast_2d(weight_mat))):
+        return score_normalized_batch(norm_mat, weight_mat, impacts, max_block_bytes)
+
+def rank_from_sorted(sorted_scores, scores):
+    # Same as rank(method='max', ascending=False): count of scores >= each score
+    return len(sorted_scores) - np.searchsorted(sorted_scores, scores, side='left')
+
+def rank_rounded(scores):
+    # rank_from_sorted for scores rounded to 6 decimals. Large inputs in [0, 1] count
+    # how often each of the 10**6 + 1 possible values occurs instead of sorting: the
+    # rank is the number of scores at or above the value, and the scattered lookups
+    # stay in one small table rather than a sorted copy of all the scores
+    scores = np.asarray(scores)
+    if len(scores) < RANK_COUNT_MIN_ROWS or not (scores.min() >= 0 and scores.max() <= 1):
+        return rank_from_sorted(np.sort(scores), scores)
+    keys = np.rint(scores * 1e6).astype(np.intp)
+    at_or_above = np.cumsum(np.bincount(keys, minlength=10**6 + 1)[::-1])[::-1]
+    return at_or_above[keys]
+
+def collect_stats(input_file, columns, chunksize, workers=None):
+    # Column sums of squares (fed in the same row blocks as compute_topsis) and min/max,
+    # plus which columns parse as floats and which parse as numbers without coercion
+    cols = list(range(1, len(columns)))
+    num_criteria = len(cols)
+    sumsq = np.zeros(num_criteria)
+    col_min = np.full(num_criteria, np.inf)
+    col_max = np.full(num_criteria, -np.inf)
+    float_cols = np.zeros(num_criteria, dtype=bool)
+    native_cols = np.ones(num_criteria, dtype=bool)
+    carry = np.empty((0, num_criteria))
+    num_rows = 0
+    for chunk in read_csv_chunks(input_file, chunksize, usecols=cols):
+        kinds = [t.kind for t in chunk.dtypes]
+        float_cols |= [k == 'f' for k in kinds]
+        native_cols &= [k in 'iuf' for k in kinds]
+        mat = ensure_numeric(chunk, list(range(num_criteria))).values
+        if not len(mat):
+            # A header-only input (or shard) keeps zero sums and infinite min/max
+            continue
+        num_rows += len(mat)
+        np.minimum(col_min, mat.min(axis=0), out=col_min)
+        np.maximum(col_max, mat.max(axis=0), out=col_max)
+        carry = np.concatenate([carry, mat])
+        full = len(carry) - len(carry) % BLOCK_ROWS
+        column_sumsq(carry[:full], out=sumsq, workers=workers)
+        carry = carry[full:]
+    column_sumsq(carry, out=sumsq)
+    return num_rows, sumsq, col_min, col_max, float_cols, native_cols
+
+def check_finite_sumsq(sumsq):
+    # A column's sum of squares is NaN or infinite exactly when it holds a missing
+    # or infinite value, or values too large to square
+    if not np.isfinite(sumsq).all():
+        error_and_exit("Decision matrix contains missing, infinite or too large values", DataError)
+
+def norms_from_sumsq(sumsq):
+    check_finite_sumsq(sumsq)
+    norm_denom = np.sqrt(sumsq)
     if (norm_denom == 0).any():
-        error_and_exit("At least one criterion column has all zeros; cannot normalize")
-    norm_mat = data_mat / norm_denom
-    weighted = norm_mat * weights
-    ideal_best = np.zeros(weighted.shape[1])
-    ideal_worst = np.zeros(weighted.shape[1])
-    for j, imp in enumerate(impacts):
-        if imp == '+':
-            ideal_best[j] = weighted[:, j].max()
-            ideal_worst[j] = weighted[:, j].min()
-        else:
-            ideal_best[j] = weighted[:, j].min()
-            ideal_worst[j] = weighted[:, j].max()
-    s_pos = np.sqrt(((weighted - ideal_best) ** 2).sum(axis=1))
-    s_neg = np.sqrt(((weighted - ideal_worst) ** 2).sum(axis=1))
-    with np.errstate(divide='ignore', invalid='ignore'):
-        score = s_neg / (s_pos + s_neg)
-    score = np.nan_to_num(score)
-    return score
+        error_and_exit("At least one criterion column has all zeros; cannot normalize", DataError)
+    return norm_denom
 
-def main():
-    if len(sys.argv) != 5:
-        print("Usage: python topsis.py <InputDataFile> <Weights(comma separated)> <Impacts(comma separated)> <ResultFileName>")
-        sys.exit(1)
-    input_file = sys.argv[1]
-    weights_str = sys.argv[2]
-    impacts_str = sys.argv[3]
-    result_file = sys.argv[4]
-    df = read_and_validate_csv(input_file)
+def float_dtypes(columns, float_cols):
+    return {columns[c]: float for c, is_float in enumerate(float_cols, start=1) if is_float}
+
+def top_k(scores, k):
+    # Indices of the k best scores in rank order (ties kept in input order) and their
+    # rank(method='max', ascending=False) ranks, without sorting all of the scores
+    scores = np.asarray(scores)
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+    winners = np.flatnonzero(scores >= kth)
+    winners = winners[np.lexsort((winners, -scores[winners]))]
+    # Every other score is below kth, so counting among the winners gives the global rank
+    ranks = rank_from_sorted(np.sort(scores[winners]), scores[winners])
+    return winners[:k], ranks[:k]
+
+def stream_topsis(input_file, weights, impacts, result_file, chunksize, top=None, scores_only=False, workers=None):
+    from topsis_mrinank_102303235.formats import write_csv_chunks
+    columns = read_csv_header(input_file)
+    cols = list(range(1, len(columns)))
+    num_criteria = len(cols)
+    # Pass 1: statistics needed for the norms and ideal solutions
+    with stage('stats_pass'):
+        num_rows, sumsq, col_min, col_max, float_cols, native_cols = collect_stats(input_file, columns, chunksize, workers)
+        if not num_rows:
+            error_and_exit("Decision matrix has no alternatives", DataError)
+        norm_denom = norms_from_sumsq(sumsq)
+        ideal_best, ideal_worst = ideal_solutions(col_min, col_max, norm_denom, weights, impacts)
+    # Pass 2: score every chunk; only the score vector is kept
+    with stage('score_pass', rows=num_rows, criteria=num_criteria, dtype='float64'):
+        score = np.empty(num_rows)
+        pos = 0
+        # Columns that parsed as numbers in pass 1 are pinned to float64 for the C parser
+        pinned = {columns[c]: np.float64 for c, native in zip(cols, native_cols) if native}
+        for chunk in read_csv_chunks(input_file, chunksize, usecols=cols, dtype=pinned):
+            mat = ensure_numeric(chunk, list(range(num_criteria))).values
+            score[pos:pos + len(mat)] = score_rows(mat, norm_denom, weights, ideal_best, ideal_worst, workers=workers)
+            pos += len(mat)
+        score = np.round(score, 6)
+    dtype = float_dtypes(columns, float_cols)
+    # With scores_only the later passes only parse the key column
+    read_kwargs = {'usecols': [0]} if scores_only else {'dtype': dtype}
+    if top is not None:
+        with stage('write_pass'):
+            write_top_rows(input_file, chunksize, read_kwargs, score, top, result_file)
+        return
+    with stage('rank'):
+        sorted_scores = np.sort(score)
+    # Final pass: attach score and rank to each chunk and stream it into the result file
+    def scored_chunks():
+        pos = 0
+        for chunk in read_csv_chunks(input_file, chunksize, **read_kwargs):
+            part = score[pos:pos + len(chunk)]
+            chunk['Topsis Score'] = part
+            chunk['Rank'] = rank_from_sorted(sorted_scores, part).astype(int)
+            pos += len(chunk)
+            yield chunk
+    with stage('write_pass'):
+        write_csv_chunks(scored_chunks(), result_file)
+
+def write_top_rows(input_file, chunksize, read_kwargs, score, top, result_file):
+    import pandas as pd
+    from topsis_mrinank_102303235.formats import write_table
+    winners, ranks = top_k(score, top)
+    order = np.argsort(winners)
+    parts = []
+    pos = 0
+    for chunk in read_csv_chunks(input_file, chunksize, **read_kwargs):
+        lo, hi = np.searchsorted(winners[order], [pos, pos + len(chunk)])
+        rows = order[lo:hi]
+        part = chunk.iloc[winners[rows] - pos].copy()
+        part['Topsis Score'] = score[winners[rows]]
+        part['Rank'] = ranks[rows]
+        part.index = rows
+        parts.append(part)
+        pos += len(chunk)
+    write_table(pd.concat(parts).sort_index(), result_file)
+
+def read_weights_file(filename):
+    import pandas as pd
+    if not os.path.isfile(filename):
+        error_and_exit("File not found: " + filename, InputFileError)
+    try:
+        raw = pd.read_csv(filename, header=None, dtype=str, skipinitialspace=True)
+    except Exception as e:
+        error_and_exit("Failed to read weights file: " + str(e))
+    names = None
+    if pd.to_numeric(raw.iloc[:, 0], errors='coerce').isnull().all():
+        names = raw.iloc[:, 0]
+        raw = raw.iloc[:, 1:]
+    if len(raw) and pd.to_numeric(raw.iloc[0], errors='coerce').isnull().all():
+        raw = raw.iloc[1:]
+        if names is not None:
+            names = names.iloc[1:]
+    weight_mat = raw.apply(pd.to_numeric, errors='coerce')
+    if len(weight_mat) == 0 or weight_mat.isnull().any().any():
+        error_and_exit("Weights file must contain one row of numeric weights per scenario", WeightsError)
+    names = [str(n) for n in names] if names is not None else [str(i + 1) for i in range(len(weight_mat))]
+    return names, weight_mat.values.astype(float)
+
+def pop_option(args, name):
+    if name not in args:
+        return None
+    i = args.index(name)
+    if i + 1 >= len(args):
+        error_and_exit("Missing value for " + name)
+    value = args[i + 1]
+    del args[i:i + 2]
+    return value
+
+def pop_flag(args, name):
+    if name not in args:
+        return False
+    args.remove(name)
+    return True
+
+def parse_positive_int(value, name):
+    try:
+        n = int(value)
+    except:
+        error_and_exit(name + " must be a positive integer")
+    if n <= 0:
+        error_and_exit(name + " must be a positive integer")
+    return n
+
+def read_cached_input(input_file, use_cache):
+    # (df, data_mat, entry, fingerprint): a cache hit gives the entry and no matrix;
+    # on a miss the fingerprint is kept so the caller can store the entry
+    from topsis_mrinank_102303235.formats import read_input
+    entry = fingerprint = None
+    if use_cache:
+        from topsis_mrinank_102303235 import cache
+        with stage('cache_lookup'):
+            entry, fingerprint = cache.lookup(input_file)
+    if entry is not None:
+        return entry.frame, None, entry, None
+    with stage('read'):
+        df, data_mat = read_input(input_file)
+    return df, data_mat, None, fingerprint
+
+def store_cached_input(input_file, fingerprint, df, data_mat):
+    from topsis_mrinank_102303235 import cache
+    return cache.store(input_file, fingerprint, df, data_mat)
+
+def run_scenarios(input_file, weights_file, impacts_str, result_file, scores_only=False, use_cache=True):
+    import pandas as pd
+    from topsis_mrinank_102303235.formats import write_table
+    df, data_mat, entry, fingerprint = read_cached_input(input_file, use_cache)
     num_criteria = df.shape[1] - 1
+    names, weight_mat = read_weights_file(weights_file)
+    impacts = parse_impacts(impacts_str)
+    if weight_mat.shape[1] != num_criteria:
+        error_and_exit("Number of weights in each scenario must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria), WeightsError)
+    if len(impacts) != num_criteria:
+        error_and_exit("Number of impacts must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria), ImpactsError)
+    if data_mat is None and entry is None:
+        with stage('ensure_numeric'):
+            data_mat = ensure_numeric(df, list(range(1, df.shape[1]))).values
+    if fingerprint is not None:
+        entry = store_cached_input(input_file, fingerprint, df, data_mat)
+    if entry is not None:
+        with stage('score', scenarios=len(weight_mat)):
+            scores = score_normalized_batch(entry.norm_mat, weight_mat, impacts, norm_range=entry.norm_range)
+    else:
+        scores = compute_topsis_batch(data_mat, weight_mat, impacts)
+    with stage('rank'):
+        results = {}
+        for name, score in zip(names, scores):
+            score = pd.Series(np.round(score, 6), index=df.index)
+            results['Topsis Score ' + name] = score
+            results['Rank ' + name] = score.rank(method='max', ascending=False).astype(int)
+        df = pd.concat([df.iloc[:, :1] if scores_only else df, pd.DataFrame(results)], axis=1)
+    with stage('write'):
+        write_table(df, result_file)
+    print("Output written to", result_file)
+
+def is_exact_float(token):
+    # Up to 15 significant digits scaled by at most 10**22: both pandas' parser and
+    # float() then round the value exactly, so the two paths write the same digits
+    mantissa, _, exponent = token.lower().partition('e')
+    whole, _, fraction = mantissa.lstrip('+-').partition('.')
+    digits = (whole + fraction).lstrip('0')
+    return len(digits) <= 15 and abs(int(exponent or 0) - len(fraction)) <= 22
+
+def read_numeric_csv(filename):
+    # Parses a CSV whose criteria columns are plain numbers the way pandas would, or
+    # returns None when pandas is needed (odd names, headers, row lengths or values)
+    try:
+        with open(filename, newline='', encoding='utf-8-sig') as f:
+            rows = [row for row in csv.reader(f) if row]
+    except Exception:
+        return None
+    if not rows:
+        return None
+    header = rows[0]
+    body = rows[1:]
+    if len(header) < 3 or len(set(header)) != len(header) or '' in header:
+        return None
+    if any(len(row) != len(header) for row in body):
+        return None
+    columns = list(zip(*body)) if body else [()] * len(header)
+    for name in columns[0]:
+        if name in PANDAS_SPECIAL or FLOAT_TOKEN.match(name) or name.strip() != name:
+            return None
+    cells = []
+    for col in columns[1:]:
+        if all(INT_TOKEN.match(v) for v in col):
+            cells.append([str(int(v)) for v in col])
+        elif all(FLOAT_TOKEN.match(v) and is_exact_float(v) for v in col):
+            cells.append([repr(float(v)) for v in col])
+        else:
+            return None
+    data_mat = np.array([[float(v) for v in col] for col in cells]).T.reshape(len(body), len(header) - 1)
+    return header, list(columns[0]), cells, data_mat
+
+def fast_topsis(input_file, weights_str, impacts_str, result_file, scores_only=False):
+    with stage('read'):
+        parsed = read_numeric_csv(input_file)
+    if parsed is None:
+        return False
+    header, names, cells, data_mat = parsed
+    num_criteria = len(header) - 1
     weights = parse_weights(weights_str)
     impacts = parse_impacts(impacts_str)
     if len(weights) != num_criteria:
-        error_and_exit("Number of weights must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria))
+        error_and_exit("Number of weights must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria), WeightsError)
     if len(impacts) != num_criteria:
-        error_and_exit("Number of impacts must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria))
-    criteria_data = ensure_numeric(df, list(range(1, df.shape[1])))
-    data_mat = criteria_data.values
-    score = compute_topsis(data_mat, weights, impacts)
-    df['Topsis Score'] = np.round(score, 6)
-    df['Rank'] = df['Topsis Score'].rank(method='max', ascending=False).astype(int)
+        error_and_exit("Number of impacts must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria), ImpactsError)
+    from topsis_mrinank_102303235.model import TopsisModel
+    score, ranks = TopsisModel().fit(data_mat).rank(weights, impacts)
+    with stage('write'):
+        try:
+            with open(result_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, lineterminator=os.linesep)
+                if scores_only:
+                    header, cells = header[:1], []
+                writer.writerow(header + ['Topsis Score', 'Rank'])
+                for i, name in enumerate(names):
+                    writer.writerow([name] + [col[i] for col in cells] + [repr(float(score[i])), str(ranks[i])])
+        except Exception as e:
+            error_and_exit("Failed to write result file: " + str(e))
+    print("Output written to", result_file)
+    return True
+
+def group_codes(df, group_by):
+    # Integer code per row for the grouping column (missing values form their own
+    # group) and the criteria column positions, which leave that column out
+    import pandas as pd
+    if group_by not in df.columns:
+        error_and_exit("Group-by column not found: " + group_by)
+    position = df.columns.get_loc(group_by)
+    if position == 0:
+        error_and_exit("Group-by column must not be the first (name) column")
+    groups = pd.factorize(df[group_by], use_na_sentinel=False)[0]
+    cols = [c for c in range(1, df.shape[1]) if c != position]
+    if len(cols) < 2:
+        error_and_exit("Input file must contain two or more criteria columns besides " + group_by, InputFileError)
+    return groups, cols
+
+def run_topsis(input_file, weights_str, impacts_str, result_file, chunksize=None, top=None, group_by=None, backend='auto',
+               scores_only=False, use_cache=True, threads=None):
+    if (chunksize is None and top is None and group_by is None and backend == 'auto'
+            and input_file.lower().endswith('.csv') and result_file.lower().endswith('.csv')
+            and os.path.isfile(input_file) and os.path.getsize(input_file) <= FAST_PATH_MAX_BYTES
+            and fast_topsis(input_file, weights_str, impacts_str, result_file, scores_only)):
+        return
+    from topsis_mrinank_102303235.formats import file_format, write_table
+    entry = fingerprint = None
+    if chunksize is not None:
+        if file_format(input_file) != 'csv' or file_format(result_file) != 'csv':
+            error_and_exit("--chunksize is only supported for CSV input and output")
+        num_criteria = len(read_csv_header(input_file)) - 1
+    else:
+        df, data_mat, entry, fingerprint = read_cached_input(input_file, use_cache and group_by is None)
+        cols = list(range(1, df.shape[1]))
+        if group_by is not None:
+            groups, cols = group_codes(df, group_by)
+            if data_mat is not None:
+                data_mat = data_mat[:, [c - 1 for c in cols]]
+        num_criteria = len(cols)
+    weights = parse_weights(weights_str)
+    impacts = parse_impacts(impacts_str)
+    expected = "from 2nd to last" if group_by is None else "from 2nd to last, without " + group_by
+    if len(weights) != num_criteria:
+        error_and_exit("Number of weights must be equal to number of criteria columns (" + expected + "). Expected " + str(num_criteria), WeightsError)
+    if len(impacts) != num_criteria:
+        error_and_exit("Number of impacts must be equal to number of criteria columns (" + expected + "). Expected " + str(num_criteria), ImpactsError)
+    if chunksize is not None:
+        stream_topsis(input_file, weights, impacts, result_file, chunksize, top, scores_only, threads)
+        print("Output written to", result_file)
+        return
+    if data_mat is None and entry is None:
+        with stage('ensure_numeric'):
+            data_mat = ensure_numeric(df, cols).values
+    if fingerprint is not None:
+        entry = store_cached_input(input_file, fingerprint, df, data_mat)
+    if group_by is not None:
+        score = compute_topsis(data_mat, weights, impacts, groups=groups)
+        with stage('rank'):
+            df['Topsis Score'] = np.round(score, 6)
+            df['Rank'] = rank_within_groups(df['Topsis Score'].values, groups)
+    else:
+        from topsis_mrinank_102303235.model import TopsisModel
+        if entry is not None:
+            model = entry.model(backend, threads)
+        else:
+            model = TopsisModel(backend=backend, workers=threads).fit(data_mat)
+        if top is not None:
+            winners, score, ranks = model.top(weights, impacts, top)
+            df = df.iloc[winners].copy()
+        else:
+            score, ranks = model.rank(weights, impacts)
+        df['Topsis Score'] = score
+        df['Rank'] = ranks
+    if scores_only:
+        df = df.iloc[:, [0, -2, -1]]
+    with stage('write'):
+        write_table(df, result_file)
+    print("Output written to", result_file)
+
+def write_profile(profile, filename):
+    import json
+    report = json.dumps(profile.report(), indent=2)
+    if filename == '-':
+        print(report)
+        return
     try:
-        df.to_csv(result_file, index=False)
+        with open(filename, 'w') as f:
+            f.write(report + '\n')
     except Exception as e:
-        error_and_exit("Failed to write result file: " + str(e))
-    print("Output written to", result_file)
+        error_and_exit("Failed to write profile report: " + str(e))
+
+def main():
+    try:
+        return run_command(sys.argv[1:])
+    except TopsisError as e:
+        print("Error:", e)
+        sys.exit(1)
+
+def topsis_command(args):
+    chunksize = pop_option(args, '--chunksize')
+    weights_file = pop_option(args, '--weights-file')
+    top = pop_option(args, '--top')
+    group_by = pop_option(args, '--group-by')
+    backend = pop_option(args, '--backend') or 'auto'
+    scores_only = pop_flag(args, '--scores-only')
+    use_cache = not pop_flag(args, '--no-cache')
+    threads = pop_option(args, '--threads')
+    if group_by is not None and (chunksize is not None or top is not None or threads is not None):
+        error_and_exit("--group-by cannot be combined with --chunksize, --top or --threads")
+    if weights_file is not None:
+        if (len(args) != 3 or chunksize is not None or top is not None or group_by is not None or backend != 'auto'
+                or threads is not None):
+            print(USAGE)
+            sys.exit(1)
+        return lambda: run_scenarios(args[0], weights_file, args[1], args[2], scores_only, use_cache)
+    if len(args) != 4:
+        print(USAGE)
+        sys.exit(1)
+    if top is not None:
+        top = parse_positive_int(top, "--top")
+    if chunksize is not None:
+        chunksize = parse_positive_int(chunksize, "--chunksize")
+    if threads is not None:
+        threads = parse_positive_int(threads, "--threads")
+    return lambda: run_topsis(args[0], args[1], args[2], args[3], chunksize, top, group_by, backend, scores_only, use_cache,
+                              threads)
+
+def run_command(args):
+    if args and args[0] in SHARD_COMMANDS:
+        from topsis_mrinank_102303235 import sharded
+        return sharded.main(args[0], args[1:])
+    if args and args[0] == 'batch':
+        from topsis_mrinank_102303235 import batch
+        return batch.main(args[1:])
+    if args and args[0] == 'serve':
+        from topsis_mrinank_102303235 import server
+        return server.main(args[1:])
+    profile_file = pop_option(args, '--profile')
+    if args and args[0] == 'smaa':
+        from topsis_mrinank_102303235 import smaa
+        run = lambda: smaa.main(args[1:])
+    else:
+        run = topsis_command(args)
+    if profile_file is None:
+        return run()
+    from topsis_mrinank_102303235.profiling import StageProfile
+    with StageProfile() as profile:
+        run()
+    write_profile(profile, profile_file)
 
 if __name__ == "__main__":
+    # Run through the package module so TopsisError raised by the subcommand
+    # modules is the same class main() catches
+    from topsis_mrinank_102303235.cli import main
     main()
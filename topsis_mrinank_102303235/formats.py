@@ -0,0 +1,140 @@
+import io
+import os
+import gzip
+import numpy as np
+import pandas as pd
+
+from topsis_mrinank_102303235.cli import TopsisError, InputFileError, DataError, error_and_exit, read_and_validate_csv
+
+FORMATS = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'arrow',
+    '.arrow': 'arrow',
+    '.ipc': 'arrow',
+    '.npy': 'npy',
+}
+
+COMPRESSIONS = {
+    '.gz': 'gzip',
+    '.zst': 'zstd',
+}
+# Rows encoded per to_csv call when writing results
+WRITE_CHUNK_ROWS = 100000
+
+def compression_of(filename):
+    return COMPRESSIONS.get(os.path.splitext(filename)[1].lower())
+
+def file_format(filename):
+    if compression_of(filename) is not None:
+        filename = os.path.splitext(filename)[0]
+    return FORMATS.get(os.path.splitext(filename)[1].lower(), 'csv')
+
+def import_pyarrow(fmt):
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        error_and_exit("Reading and writing " + fmt + " files requires pyarrow. Install with: pip install pyarrow")
+    return pyarrow
+
+def read_input(filename):
+    # Returns the input frame and, for binary formats, the criteria matrix so the
+    # text-oriented ensure_numeric coercion can be skipped (None means not available)
+    fmt = file_format(filename)
+    if fmt == 'csv':
+        return read_and_validate_csv(filename), None
+    if not os.path.isfile(filename):
+        error_and_exit("File not found: " + filename, InputFileError)
+    if fmt == 'npy':
+        return read_npy(filename)
+    return read_arrow_table(filename, fmt)
+
+def read_npy(filename):
+    # The matrix is memory-mapped and the frame is a view on it; alternatives are numbered from 1
+    try:
+        data_mat = np.load(filename, mmap_mode='r')
+    except Exception as e:
+        error_and_exit("Failed to read .npy file: " + str(e), InputFileError)
+    if data_mat.ndim != 2 or data_mat.shape[1] < 2:
+        error_and_exit("Input matrix must be two-dimensional with two or more criteria columns", DataError)
+    if data_mat.dtype.kind not in 'iuf':
+        error_and_exit("Non-numeric data found in criteria columns", DataError)
+    df = pd.DataFrame(data_mat, columns=['C' + str(j + 1) for j in range(data_mat.shape[1])], copy=False)
+    df.insert(0, 'Alternative', np.arange(1, len(df) + 1))
+    return df, data_mat
+
+def read_arrow_table(filename, fmt):
+    pa = import_pyarrow(fmt)
+    try:
+        source = pa.memory_map(filename)
+        if fmt == 'parquet':
+            table = pa.parquet.read_table(source)
+        else:
+            table = pa.ipc.open_file(source).read_all()
+    except Exception as e:
+        error_and_exit("Failed to read " + fmt + " file: " + str(e), InputFileError)
+    if table.num_columns < 3:
+        error_and_exit("Input file must contain three or more columns", InputFileError)
+    # split_blocks gives every numeric column its own array viewing the Arrow
+    # buffer, so the frame adds no copy of the criteria. The scoring matrix is the
+    # one copy: it is filled straight from those arrays
+    df = table.to_pandas(split_blocks=True)
+    criteria = table.columns[1:]
+    numeric = all(pa.types.is_integer(c.type) or pa.types.is_floating(c.type) for c in criteria)
+    if not numeric or any(c.null_count for c in criteria):
+        return df, None
+    data_mat = np.empty((table.num_rows, len(criteria)))
+    for j in range(len(criteria)):
+        data_mat[:, j] = df.iloc[:, j + 1].to_numpy()
+    return df, data_mat
+
+def open_csv_output(filename):
+    # Text handle for CSV output, compressed on the fly for .gz and .zst names
+    compression = compression_of(filename)
+    if compression == 'gzip':
+        return gzip.open(filename, 'wt', compresslevel=6, newline='', encoding='utf-8')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            error_and_exit("Writing .zst files requires zstandard. Install with: pip install zstandard")
+        stream = zstandard.ZstdCompressor(level=3).stream_writer(open(filename, 'wb'))
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    return open(filename, 'w', newline='', encoding='utf-8')
+
+def write_csv_chunks(chunks, filename):
+    # Encodes and writes frames one at a time through a single handle; the first
+    # frame (possibly empty) supplies the header
+    try:
+        with open_csv_output(filename) as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, index=False, header=i == 0)
+    except TopsisError:
+        raise
+    except Exception as e:
+        error_and_exit("Failed to write result file: " + str(e))
+
+def write_table(df, filename):
+    fmt = file_format(filename)
+    if compression_of(filename) is not None and fmt != 'csv':
+        error_and_exit("Compressed output (.gz, .zst) is only supported for CSV files")
+    if fmt == 'csv':
+        write_csv_chunks((df.iloc[start:start + WRITE_CHUNK_ROWS] for start in range(0, max(len(df), 1), WRITE_CHUNK_ROWS)), filename)
+        return
+    try:
+        if fmt == 'npy':
+            # Only the numeric result columns fit in a plain matrix
+            np.save(filename, df[['Topsis Score', 'Rank']].to_numpy(dtype=float))
+        else:
+            pa = import_pyarrow(fmt)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if fmt == 'parquet':
+                pa.parquet.write_table(table, filename)
+            else:
+                with pa.ipc.new_file(filename, table.schema) as writer:
+                    writer.write_table(table)
+    except Exception as e:
+        error_and_exit("Failed to write result file: " + str(e))
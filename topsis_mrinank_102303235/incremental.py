@@ -0,0 +1,189 @@
+import numpy as np
+
+from topsis_mrinank_102303235.cli import (
+    DataError,
+    ImpactsError,
+    error_and_exit,
+    as_weights,
+    as_impacts,
+    column_sumsq,
+    norms_from_sumsq,
+    ideal_solutions,
+    score_rows,
+    rank_from_sorted,
+)
+
+class IncrementalTopsis:
+    """
+    TOPSIS scores for a changing set of alternatives.
+
+    Keeps running column sums of squares and per-column min/max with the number
+    of rows holding them, so add/update/remove are O(criteria). Scoring is lazy:
+    mutations only mark rows dirty, and the next scores() call rescores just the
+    dirty rows when the norms and ideal solutions are unchanged, or every row in
+    one vectorized pass when they moved. The running sums are added up in a
+    different order than compute_topsis does, so scores agree with it on the
+    live rows to within floating-point rounding, not bit for bit.
+
+    Weights and impacts can be given as the CLI's comma separated strings or as
+    sequences; keys and data (one row per key) preload alternatives.
+    """
+
+    def __init__(self, weights, impacts, keys=None, data=None, capacity=1024):
+        self.weights = as_weights(weights)
+        self.impacts = as_impacts(impacts)
+        if len(self.impacts) != len(self.weights):
+            error_and_exit("Number of impacts must be equal to number of weights", ImpactsError)
+        if data is not None:
+            try:
+                data = np.asarray(data, dtype=float)
+            except (TypeError, ValueError):
+                error_and_exit("Non-numeric data found in criteria values", DataError)
+            if keys is None or data.ndim != 2 or len(keys) != len(data):
+                error_and_exit("data must be a matrix with one row per key in keys", DataError)
+        num_criteria = len(self.weights)
+        self._data = np.empty((capacity, num_criteria))
+        self._scores = np.zeros(capacity)
+        self._dirty = np.zeros(capacity, dtype=bool)
+        self._keys = []
+        self._index = {}
+        self._sumsq = np.zeros(num_criteria)
+        self._removed = 0
+        self._min = np.full(num_criteria, np.inf)
+        self._max = np.full(num_criteria, -np.inf)
+        self._min_count = np.zeros(num_criteria, dtype=int)
+        self._max_count = np.zeros(num_criteria, dtype=int)
+        self._extremes_stale = False
+        self._state = None
+        self.full_rescores = 0
+        if data is not None:
+            for key, values in zip(keys, data):
+                self.add(key, values)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def keys(self):
+        return list(self._keys)
+
+    def add(self, key, values):
+        if key in self._index:
+            error_and_exit("Alternative already exists: " + str(key))
+        values = self._check_values(values)
+        row = len(self._keys)
+        if row == len(self._data):
+            self._grow()
+        self._data[row] = values
+        self._dirty[row] = True
+        self._keys.append(key)
+        self._index[key] = row
+        self._include(values)
+
+    def update(self, key, values):
+        if key not in self._index:
+            error_and_exit("Unknown alternative: " + str(key))
+        values = self._check_values(values)
+        row = self._index[key]
+        self._exclude(self._data[row])
+        self._data[row] = values
+        self._dirty[row] = True
+        self._include(values)
+
+    def remove(self, key):
+        if key not in self._index:
+            error_and_exit("Unknown alternative: " + str(key))
+        row = self._index.pop(key)
+        self._exclude(self._data[row])
+        last = len(self._keys) - 1
+        if row != last:
+            moved = self._keys[last]
+            self._data[row] = self._data[last]
+            self._scores[row] = self._scores[last]
+            self._dirty[row] = self._dirty[last]
+            self._keys[row] = moved
+            self._index[moved] = row
+        self._keys.pop()
+        self._dirty[last] = False
+
+    def scores(self):
+        size = len(self._keys)
+        data = self._data[:size]
+        if self._removed > size:
+            # Subtractions accumulate rounding error; rebuild the sums from the live rows
+            self._sumsq = column_sumsq(data)
+            self._removed = 0
+        if self._extremes_stale:
+            self._refresh_extremes(data)
+        norm_denom = norms_from_sumsq(self._sumsq)
+        ideal_best, ideal_worst = ideal_solutions(self._min, self._max, norm_denom, self.weights, self.impacts)
+        state = (norm_denom, ideal_best, ideal_worst)
+        if self._state is not None and all(np.array_equal(a, b) for a, b in zip(state, self._state)):
+            rows = np.flatnonzero(self._dirty[:size])
+            if len(rows):
+                self._scores[rows] = score_rows(data[rows], norm_denom, self.weights, ideal_best, ideal_worst)
+        else:
+            self._scores[:size] = score_rows(data, norm_denom, self.weights, ideal_best, ideal_worst)
+            self._state = state
+            self.full_rescores += 1
+        self._dirty[:size] = False
+        return self._scores[:size].copy()
+
+    def ranks(self):
+        score = np.round(self.scores(), 6)
+        return rank_from_sorted(np.sort(score), score).astype(int)
+
+    def _check_values(self, values):
+        try:
+            values = np.asarray(values, dtype=float)
+        except (TypeError, ValueError):
+            error_and_exit("Non-numeric data found in criteria values", DataError)
+        if values.shape != self.weights.shape:
+            error_and_exit("Expected " + str(len(self.weights)) + " criteria values", DataError)
+        if not np.isfinite(values).all():
+            error_and_exit("Non-numeric data found in criteria values", DataError)
+        return values
+
+    def _grow(self):
+        capacity = 2 * len(self._data)
+        data = np.empty((capacity, self._data.shape[1]))
+        data[:len(self._data)] = self._data
+        self._data = data
+        self._scores = np.concatenate([self._scores, np.zeros(capacity - len(self._scores))])
+        self._dirty = np.concatenate([self._dirty, np.zeros(capacity - len(self._dirty), dtype=bool)])
+
+    def _include(self, values):
+        self._sumsq += values * values
+        if self._extremes_stale:
+            return
+        lower = values < self._min
+        self._min = np.where(lower, values, self._min)
+        self._min_count = np.where(lower, 1, self._min_count + (values == self._min))
+        higher = values > self._max
+        self._max = np.where(higher, values, self._max)
+        self._max_count = np.where(higher, 1, self._max_count + (values == self._max))
+
+    def _exclude(self, values):
+        self._sumsq -= values * values
+        self._removed += 1
+        if self._extremes_stale:
+            return
+        self._min_count -= values == self._min
+        self._max_count -= values == self._max
+        if (self._min_count == 0).any() or (self._max_count == 0).any():
+            self._extremes_stale = True
+
+    def _refresh_extremes(self, data):
+        if len(data):
+            self._min = data.min(axis=0)
+            self._max = data.max(axis=0)
+            self._min_count = (data == self._min).sum(axis=0)
+            self._max_count = (data == self._max).sum(axis=0)
+        else:
+            self._min = np.full(len(self.weights), np.inf)
+            self._max = np.full(len(self.weights), -np.inf)
+            self._min_count = np.zeros(len(self.weights), dtype=int)
+            self._max_count = np.zeros(len(self.weights), dtype=int)
+        self._extremes_stale = False
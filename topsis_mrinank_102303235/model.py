@@ -0,0 +1,122 @@
+import numpy as np
+
+from topsis_mrinank_102303235.cli import (
+    DataError,
+    WeightsError,
+    ImpactsError,
+    error_and_exit,
+    as_weights,
+    as_impacts,
+    as_float_matrix,
+    column_sumsq,
+    column_range,
+    norms_from_sumsq,
+    ideal_solutions,
+    rank_rounded,
+    top_k,
+)
+from topsis_mrinank_102303235.backends import score_with_backend
+from topsis_mrinank_102303235.profiling import stage
+
+class TopsisModel:
+    """
+    TOPSIS over one decision matrix, fitted once and scored many times.
+
+    fit() validates the matrix and keeps its column norms and min/max, so score(),
+    rank() and top() only do the weighting, distance and ranking steps for each
+    set of weights and impacts. Weights and impacts can be given as the CLI's
+    comma separated strings or as sequences. workers=N splits fit() and score()
+    over N threads, as compute_topsis does. Problems raise TopsisError
+    subclasses (DataError, WeightsError, ImpactsError); nothing here exits the
+    process.
+    """
+
+    __slots__ = ('dtype', 'backend', 'workers', 'data_mat', 'divisor', 'norm_denom', 'col_min', 'col_max')
+
+    def __init__(self, dtype=np.float64, backend='auto', workers=None):
+        self.dtype = np.dtype(dtype)
+        self.backend = backend
+        self.workers = workers
+        self.data_mat = None
+        # What the scoring kernels divide data_mat by: the column norms, or ones
+        # when data_mat is already normalized
+        self.divisor = None
+        self.norm_denom = None
+        self.col_min = None
+        self.col_max = None
+
+    def fit(self, matrix):
+        data_mat = as_float_matrix(matrix, self.dtype)
+        if data_mat.ndim != 2 or data_mat.shape[1] < 2:
+            error_and_exit("Decision matrix must be two-dimensional with two or more criteria columns", DataError)
+        if not len(data_mat):
+            error_and_exit("Decision matrix has no alternatives", DataError)
+        with stage('normalize', rows=data_mat.shape[0], criteria=data_mat.shape[1], dtype=str(data_mat.dtype)):
+            sumsq = column_sumsq(data_mat, workers=self.workers)
+            col_min, col_max = column_range(data_mat, self.workers)
+            self.norm_denom = norms_from_sumsq(sumsq)
+        self.data_mat = data_mat
+        self.divisor = self.norm_denom
+        self.col_min = col_min
+        self.col_max = col_max
+        return self
+
+    @classmethod
+    def from_normalized(cls, norm_mat, norm_denom, col_min, col_max, backend='auto', workers=None):
+        # A model over a matrix already divided by its column norms (such as a cache
+        # entry); norm_denom and col_min/col_max belong to the raw matrix. Dividing
+        # by ones is exact, so the scores match a model fitted on the raw matrix
+        model = cls(backend=backend, workers=workers)
+        model.data_mat = norm_mat
+        model.norm_denom = np.asarray(norm_denom, dtype=float)
+        model.divisor = np.ones(len(model.norm_denom))
+        model.col_min = np.asarray(col_min, dtype=float)
+        model.col_max = np.asarray(col_max, dtype=float)
+        return model
+
+    @property
+    def num_criteria(self):
+        return None if self.data_mat is None else self.data_mat.shape[1]
+
+    @property
+    def nbytes(self):
+        return 0 if self.data_mat is None else self.data_mat.nbytes
+
+    def __len__(self):
+        return 0 if self.data_mat is None else len(self.data_mat)
+
+    def check(self, weights, impacts):
+        # Parsed weights (float array) and impacts (list of '+'/'-') for this model
+        if self.data_mat is None:
+            error_and_exit("TopsisModel must be fitted before scoring")
+        weights = as_weights(weights)
+        impacts = as_impacts(impacts)
+        if len(weights) != self.num_criteria:
+            error_and_exit("Number of weights must be equal to number of criteria columns. Expected " + str(self.num_criteria), WeightsError)
+        if len(impacts) != self.num_criteria:
+            error_and_exit("Number of impacts must be equal to number of criteria columns. Expected " + str(self.num_criteria), ImpactsError)
+        return weights, impacts
+
+    def score(self, weights, impacts):
+        weights, impacts = self.check(weights, impacts)
+        ideal_best, ideal_worst = ideal_solutions(self.col_min, self.col_max, self.norm_denom, weights, impacts)
+        rows, criteria = self.data_mat.shape
+        with stage('score', rows=rows, criteria=criteria, dtype=str(self.data_mat.dtype)):
+            return score_with_backend(self.backend, self.data_mat, self.divisor, weights,
+                                      ideal_best, ideal_worst, self.dtype, self.workers)
+
+    def rank(self, weights, impacts):
+        # (scores rounded to 6 decimals, ranks) with rank(method='max', ascending=False)
+        # semantics, as written by the CLI
+        score = np.round(self.score(weights, impacts), 6)
+        with stage('rank'):
+            return score, rank_rounded(score)
+
+    def top(self, weights, impacts, k):
+        # (rows, scores, ranks) of the k best alternatives in rank order
+        if isinstance(k, bool) or not isinstance(k, (int, np.integer)) or k < 1:
+            error_and_exit("k must be a positive integer")
+        score = np.round(self.score(weights, impacts), 6)
+        with stage('rank'):
+            rows, ranks = top_k(score, k)
+        return rows, score[rows], ranks
@@ -0,0 +1,93 @@
+import sys
+import time
+import contextvars
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Hooks are per context (each thread, and each asyncio task, has its own), so a
+# profile only sees the stages run by the code it wraps, not those of concurrent
+# Streamlit sessions or server requests in the same process
+_hooks = contextvars.ContextVar('topsis_stage_hooks', default=())
+
+def add_stage_hook(hook):
+    # hook(record) is called after every pipeline stage run in the current context
+    # with a dict holding 'stage', 'wall_seconds', 'cpu_seconds' and any extra info
+    _hooks.set(_hooks.get() + (hook,))
+    return hook
+
+def remove_stage_hook(hook):
+    _hooks.set(tuple(h for h in _hooks.get() if h is not hook))
+
+@contextmanager
+def stage(name, **info):
+    hooks = _hooks.get()
+    if not hooks:
+        yield
+        return
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        record = {'stage': name}
+        record.update(info)
+        record['wall_seconds'] = time.perf_counter() - wall
+        record['cpu_seconds'] = time.process_time() - cpu
+        for hook in hooks:
+            hook(record)
+
+def peak_rss_bytes():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class StageProfile:
+    """
+    Collects per-stage timings while active:
+
+        with StageProfile() as profile:
+            compute_topsis(data_mat, weights, impacts)
+        print(profile.report())
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.wall_seconds = None
+        self.cpu_seconds = None
+
+    def __call__(self, record):
+        self.stages.append(record)
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        add_stage_hook(self)
+        return self
+
+    def __exit__(self, *exc):
+        remove_stage_hook(self)
+        self.wall_seconds = time.perf_counter() - self._wall
+        self.cpu_seconds = time.process_time() - self._cpu
+        return False
+
+    def report(self):
+        report = {
+            'stages': self.stages,
+            'total_wall_seconds': self.wall_seconds,
+            'total_cpu_seconds': self.cpu_seconds,
+            'peak_rss_bytes': peak_rss_bytes(),
+        }
+        # Shape and dtype come from the stages that report them (the last one wins)
+        for record in self.stages:
+            for key in ('rows', 'criteria', 'dtype'):
+                if key in record:
+                    report[key] = record[key]
+        if report.get('rows') and self.wall_seconds:
+            report['rows_per_second'] = report['rows'] / self.wall_seconds
+        return report
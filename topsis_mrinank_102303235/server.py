@@ -0,0 +1,277 @@
+import sys
+import json
+import time
+import asyncio
+from collections import deque
+
+import numpy as np
+
+from topsis_mrinank_102303235.cli import (
+    TopsisError,
+    WeightsError,
+    ImpactsError,
+    error_and_exit,
+    parse_weights,
+    parse_impacts,
+    parse_positive_int,
+    pop_option,
+    ensure_numeric,
+    normalize_matrix,
+    score_normalized_batch,
+    rank_rounded,
+    top_k,
+)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 64
+DEFAULT_BATCH_WAIT_MS = 1.0
+MAX_BODY_BYTES = 16 * 1024 * 1024
+LATENCY_WINDOW = 10000
+
+USAGE = """Usage: topsis serve <Name>=<InputDataFile> [<Name>=<InputDataFile> ...] [--host HOST] [--port PORT] [--max-batch N] [--batch-wait-ms MS]"""
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+class Dataset:
+    """A loaded input: alternative names and the normalized matrix with its column range"""
+
+    def __init__(self, name, filename):
+        from topsis_mrinank_102303235.formats import read_input
+        df, data_mat = read_input(filename)
+        if data_mat is None:
+            data_mat = ensure_numeric(df, list(range(1, df.shape[1]))).values
+        self.name = name
+        self.filename = filename
+        self.columns = [str(c) for c in df.columns]
+        self.names = df.iloc[:, 0].tolist()
+        self.norm_mat = normalize_matrix(data_mat)
+        self.norm_range = (self.norm_mat.min(axis=0), self.norm_mat.max(axis=0))
+
+    def describe(self):
+        return {'name': self.name, 'file': self.filename, 'rows': len(self.names),
+                'criteria': self.columns[1:]}
+
+class ScoringServer:
+    """
+    Local HTTP server over asyncio that keeps datasets normalized in memory.
+
+    Concurrent POST /score requests for the same dataset are queued and scored
+    together: a batcher takes everything waiting (up to max_batch, after at most
+    batch_wait seconds) and runs one score_normalized_batch pass in a worker
+    thread. Bad requests are answered with an error status and a JSON message.
+    """
+
+    def __init__(self, datasets, max_batch=DEFAULT_MAX_BATCH, batch_wait=DEFAULT_BATCH_WAIT_MS / 1000):
+        self.datasets = {d.name: d for d in datasets}
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self._queues = {}
+        self._tasks = []
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        for name in self.datasets:
+            self._queues[name] = asyncio.Queue()
+            self._tasks.append(asyncio.create_task(self._batcher(name)))
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000
+        report = {
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_requests / self.batches if self.batches else None,
+        }
+        for p in (50, 90, 99):
+            report['p%d_ms' % p] = float(np.percentile(latencies, p)) if len(latencies) else None
+        report['max_ms'] = float(latencies.max()) if len(latencies) else None
+        return report
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                if len(parts) != 3:
+                    await self._respond(writer, 400, {'error': 'Malformed request line'}, False)
+                    break
+                method, path, version = parts
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= MAX_BODY_BYTES:
+                    await self._respond(writer, 413 if length > 0 else 400, {'error': 'Invalid request body size'}, False)
+                    break
+                body = await reader.readexactly(length)
+                start = time.perf_counter()
+                status, payload = await self._dispatch(method, path.split('?')[0], body)
+                self.requests += 1
+                if status != 200:
+                    self.errors += 1
+                self.latencies.append(time.perf_counter() - start)
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = 'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: %s\r\n\r\n' % (
+            status, STATUS_TEXT[status], len(body), 'keep-alive' if keep_alive else 'close')
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def _dispatch(self, method, path, body):
+        if path == '/datasets' and method == 'GET':
+            return 200, {'datasets': [d.describe() for d in self.datasets.values()]}
+        if path == '/stats' and method == 'GET':
+            return 200, self.stats()
+        if path != '/score':
+            return 404, {'error': 'Unknown path: ' + path}
+        if method != 'POST':
+            return 405, {'error': 'Use POST for /score'}
+        try:
+            request = self._parse_score_request(body)
+        except TopsisError as e:
+            return 400, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': type(e).__name__ + ': ' + str(e)}
+        if request['dataset'] not in self.datasets:
+            return 404, {'error': 'Unknown dataset: ' + str(request['dataset'])}
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[request['dataset']].put((request, future))
+        try:
+            return 200, await future
+        except TopsisError as e:
+            return 400, {'error': str(e)}
+        except Exception as e:
+            return 500, {'error': type(e).__name__ + ': ' + str(e)}
+
+    def _parse_score_request(self, body):
+        # {"dataset": name, "weights": "1,2,1" or [1, 2, 1], "impacts": "+,-,+" or [...], "top": K}
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            error_and_exit("Request body must be JSON")
+        if not isinstance(request, dict) or not {'dataset', 'weights', 'impacts'} <= request.keys():
+            error_and_exit("Request must be a JSON object with dataset, weights and impacts")
+        if not isinstance(request['dataset'], str):
+            error_and_exit("dataset must be a string")
+        weights, impacts = request['weights'], request['impacts']
+        if not isinstance(weights, (str, list)):
+            error_and_exit("weights must be a comma separated string or a list", WeightsError)
+        if not isinstance(impacts, (str, list)):
+            error_and_exit("impacts must be a comma separated string or a list", ImpactsError)
+        weights = parse_weights(weights if isinstance(weights, str) else ','.join(map(str, weights)))
+        impacts = parse_impacts(impacts if isinstance(impacts, str) else ','.join(map(str, impacts)))
+        dataset = self.datasets.get(request['dataset'])
+        if dataset is not None:
+            num_criteria = dataset.norm_mat.shape[1]
+            if len(weights) != num_criteria or len(impacts) != num_criteria:
+                error_and_exit("Number of weights and impacts must be equal to number of criteria columns. Expected " + str(num_criteria))
+        top = request.get('top')
+        if top is not None and (not isinstance(top, int) or isinstance(top, bool) or top < 1):
+            error_and_exit("top must be a positive integer")
+        return {'dataset': request['dataset'], 'weights': weights, 'impacts': impacts, 'top': top}
+
+    async def _batcher(self, name):
+        queue = self._queues[name]
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_wait
+            while len(batch) < self.max_batch:
+                if queue.empty():
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(queue.get_nowait())
+            self.batches += 1
+            self.batched_requests += len(batch)
+            requests = [request for request, _ in batch]
+            try:
+                results = await loop.run_in_executor(None, self._score_batch, self.datasets[name], requests)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _score_batch(self, dataset, requests):
+        # One vectorized pass for the whole batch (one weight and impact row per request)
+        weight_mat = np.array([r['weights'] for r in requests])
+        impacts = np.array([r['impacts'] for r in requests])
+        scores = np.round(score_normalized_batch(dataset.norm_mat, weight_mat, impacts, norm_range=dataset.norm_range), 6)
+        results = []
+        for request, score in zip(requests, scores):
+            if request['top'] is not None:
+                winners, ranks = top_k(score, request['top'])
+                results.append({'names': [dataset.names[i] for i in winners], 'rows': winners.tolist(),
+                                'scores': score[winners].tolist(), 'ranks': ranks.tolist()})
+            else:
+                ranks = rank_rounded(score)
+                results.append({'names': dataset.names, 'scores': score.tolist(), 'ranks': ranks.tolist()})
+        return results
+
+async def serve(datasets, host, port, max_batch, batch_wait):
+    server = ScoringServer(datasets, max_batch, batch_wait)
+    await server.start(host, port)
+    print("Serving", ", ".join(server.datasets), "on http://%s:%d (POST /score, GET /datasets, GET /stats)" % (host, port), flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        print("Latency summary:", json.dumps(server.stats()))
+
+def main(args):
+    args = list(args)
+    host = pop_option(args, '--host') or DEFAULT_HOST
+    port = pop_option(args, '--port')
+    max_batch = pop_option(args, '--max-batch')
+    batch_wait = pop_option(args, '--batch-wait-ms')
+    if not args or any('=' not in a for a in args):
+        print(USAGE)
+        sys.exit(1)
+    port = DEFAULT_PORT if port is None else parse_positive_int(port, "--port")
+    max_batch = DEFAULT_MAX_BATCH if max_batch is None else parse_positive_int(max_batch, "--max-batch")
+    try:
+        batch_wait = DEFAULT_BATCH_WAIT_MS if batch_wait is None else float(batch_wait)
+    except ValueError:
+        error_and_exit("--batch-wait-ms must be a number")
+    datasets = []
+    for spec in args:
+        name, _, filename = spec.partition('=')
+        datasets.append(Dataset(name, filename))
+        print("Loaded", name, "from", filename, "(" + str(len(datasets[-1].names)) + " rows)")
+    try:
+        asyncio.run(serve(datasets, host, port, max_batch, batch_wait / 1000))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+
+from topsis_mrinank_102303235.cli import (
+    DataError,
+    error_and_exit,
+    parse_weights,
+    parse_impacts,
+    parse_positive_int,
+    pop_option,
+    read_csv_header,
+    read_csv_chunks,
+    ensure_numeric,
+    collect_stats,
+    norms_from_sumsq,
+    float_dtypes,
+    ideal_solutions,
+    score_rows,
+    rank_from_sorted,
+)
+
+DEFAULT_CHUNKSIZE = 100000
+
+USAGE = """Usage: topsis stats <ShardFile> <StatsFile> [--chunksize N]
+       topsis merge <Weights(comma separated)> <Impacts(comma separated)> <ModelFile> <StatsFile> [<StatsFile> ...]
+       topsis score <ModelFile> <ShardFile> <ScoredFile> [--chunksize N]
+       topsis rank <ScoredFile> [<ScoredFile> ...] [--chunksize N]"""
+
+def write_json(obj, filename):
+    try:
+        with open(filename, 'w') as f:
+            json.dump(obj, f, indent=2)
+    except Exception as e:
+        error_and_exit("Failed to write " + filename + ": " + str(e))
+
+def read_json(filename):
+    if not os.path.isfile(filename):
+        error_and_exit("File not found: " + filename)
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except Exception as e:
+        error_and_exit("Failed to read " + filename + ": " + str(e))
+
+def shard_stats(shard_file, chunksize=DEFAULT_CHUNKSIZE):
+    # Partial statistics of one shard; the raw column min/max become the weighted
+    # min/max at merge time, once the global norms and the weights are known. An
+    # empty shard has zero sums and infinite min/max, which the merge absorbs
+    columns = read_csv_header(shard_file)
+    num_rows, sumsq, col_min, col_max, float_cols, _ = collect_stats(shard_file, columns, chunksize)
+    return {
+        'columns': list(columns),
+        'rows': num_rows,
+        'sumsq': sumsq.tolist(),
+        'min': col_min.tolist(),
+        'max': col_max.tolist(),
+        'float_columns': float_cols.tolist(),
+    }
+
+def merge_stats(partials, weights, impacts):
+    columns = partials[0]['columns']
+    for part in partials[1:]:
+        if part['columns'] != columns:
+            error_and_exit("All shards must have the same columns")
+    num_criteria = len(columns) - 1
+    if len(weights) != num_criteria:
+        error_and_exit("Number of weights must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria))
+    if len(impacts) != num_criteria:
+        error_and_exit("Number of impacts must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria))
+    if not sum(part['rows'] for part in partials):
+        error_and_exit("Decision matrix has no alternatives", DataError)
+    sumsq = np.zeros(num_criteria)
+    for part in partials:
+        sumsq += part['sumsq']
+    col_min = np.min([part['min'] for part in partials], axis=0)
+    col_max = np.max([part['max'] for part in partials], axis=0)
+    norm_denom = norms_from_sumsq(sumsq)
+    ideal_best, ideal_worst = ideal_solutions(col_min, col_max, norm_denom, weights, impacts)
+    return {
+        'columns': columns,
+        'rows': sum(part['rows'] for part in partials),
+        'norm': norm_denom.tolist(),
+        'weights': list(map(float, weights)),
+        'impacts': list(impacts),
+        'ideal_best': ideal_best.tolist(),
+        'ideal_worst': ideal_worst.tolist(),
+        'float_columns': np.any([part['float_columns'] for part in partials], axis=0).tolist(),
+    }
+
+def score_shard(model, shard_file, result_file, chunksize=DEFAULT_CHUNKSIZE):
+    columns = read_csv_header(shard_file)
+    if list(columns) != model['columns']:
+        error_and_exit("Shard columns do not match the model: " + shard_file)
+    cols = list(range(1, len(columns)))
+    norm_denom = np.array(model['norm'])
+    weights = np.array(model['weights'])
+    ideal_best = np.array(model['ideal_best'])
+    ideal_worst = np.array(model['ideal_worst'])
+    dtype = float_dtypes(columns, model['float_columns'])
+    first = True
+    try:
+        for chunk in read_csv_chunks(shard_file, chunksize, dtype=dtype):
+            mat = ensure_numeric(chunk, cols).values
+            chunk['Topsis Score'] = np.round(score_rows(mat, norm_denom, weights, ideal_best, ideal_worst), 6)
+            chunk.to_csv(result_file, index=False, mode='w' if first else 'a', header=first)
+            first = False
+        if first:
+            pd.DataFrame(columns=list(columns) + ['Topsis Score']).to_csv(result_file, index=False)
+    except Exception as e:
+        error_and_exit("Failed to write result file: " + str(e))
+
+def rank_shards(scored_files, chunksize=DEFAULT_CHUNKSIZE):
+    # Only the score column of every shard is gathered; rows are rewritten shard by shard
+    scores = []
+    for filename in scored_files:
+        if not os.path.isfile(filename):
+            error_and_exit("File not found: " + filename)
+        for chunk in read_csv_chunks(filename, chunksize, usecols=['Topsis Score']):
+            scores.append(chunk['Topsis Score'].values)
+    sorted_scores = np.sort(np.concatenate(scores)) if scores else np.empty(0)
+    for filename in scored_files:
+        tmp_file = filename + '.tmp'
+        first = True
+        try:
+            for chunk in read_csv_chunks(filename, chunksize):
+                chunk['Rank'] = rank_from_sorted(sorted_scores, chunk['Topsis Score'].values).astype(int)
+                chunk.to_csv(tmp_file, index=False, mode='w' if first else 'a', header=first)
+                first = False
+            if first:
+                columns = pd.read_csv(filename, nrows=0).columns
+                pd.DataFrame(columns=list(columns) + ['Rank']).to_csv(tmp_file, index=False)
+            os.replace(tmp_file, filename)
+        except Exception as e:
+            error_and_exit("Failed to write result file: " + str(e))
+
+def main(command, args):
+    args = list(args)
+    chunksize = pop_option(args, '--chunksize')
+    chunksize = DEFAULT_CHUNKSIZE if chunksize is None else parse_positive_int(chunksize, "--chunksize")
+    if command == 'stats' and len(args) == 2:
+        write_json(shard_stats(args[0], chunksize), args[1])
+        print("Statistics written to", args[1])
+    elif command == 'merge' and len(args) >= 4:
+        weights = parse_weights(args[0])
+        impacts = parse_impacts(args[1])
+        partials = [read_json(f) for f in args[3:]]
+        write_json(merge_stats(partials, weights, impacts), args[2])
+        print("Model written to", args[2])
+    elif command == 'score' and len(args) == 3:
+        score_shard(read_json(args[0]), args[1], args[2], chunksize)
+        print("Output written to", args[2])
+    elif command == 'rank' and len(args) >= 1:
+        rank_shards(args, chunksize)
+        print("Ranks written to", ", ".join(args))
+    else:
+        print(USAGE)
+        sys.exit(1)
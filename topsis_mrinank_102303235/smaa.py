@@ -0,0 +1,195 @@
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from topsis_mrinank_102303235.cli import (
+    error_and_exit,
+    parse_weights,
+    parse_impacts,
+    parse_positive_int,
+    pop_option,
+    ensure_numeric,
+    normalize_matrix,
+    score_normalized_batch,
+)
+from topsis_mrinank_102303235.profiling import stage
+
+DEFAULT_SAMPLES = 10000
+# Rank columns kept by default; counts take alternatives x ranks integers
+DEFAULT_MAX_RANK = 10
+SAMPLE_BLOCK = 1024
+# Budget for each (samples x alternatives) array of a block; with many
+# alternatives a block holds fewer samples
+SAMPLE_BLOCK_BYTES = 32 * 1024 * 1024
+# Samples per task; tasks get their own seed, so results do not depend on the worker count
+TASK_SAMPLES = 16384
+
+USAGE = """Usage: topsis smaa <InputDataFile> <Impacts(comma separated)> <ResultFileName> [--samples N] [--seed S] [--workers N] [--ranks K]
+                   [--weights W [--concentration C] | --weight-intervals LOW:HIGH,LOW:HIGH,...]"""
+
+def sample_weights(rng, count, alpha=None, low=None, high=None):
+    # Weight vectors summing to 1: Dirichlet(alpha), or uniform within [low, high]
+    # per criterion and then rescaled (TOPSIS scores do not change with the scale)
+    if low is not None:
+        weights = rng.uniform(low, high, size=(count, len(low)))
+    else:
+        weights = rng.dirichlet(alpha, size=count)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+def ranks_per_sample(scores):
+    # rank(method='max', ascending=False) of every row of a (samples x alternatives)
+    # matrix at once, on scores rounded to 6 decimals: after a row-wise sort, the
+    # rank of a score is the number of alternatives minus where its tie run starts
+    num_alts = scores.shape[1]
+    keys = np.rint(scores * 1e6).astype(np.int64)
+    order = np.argsort(keys, axis=1)
+    sorted_keys = np.take_along_axis(keys, order, axis=1)
+    new_run = np.ones(keys.shape, dtype=bool)
+    new_run[:, 1:] = sorted_keys[:, 1:] != sorted_keys[:, :-1]
+    run_start = np.maximum.accumulate(np.where(new_run, np.arange(num_alts), 0), axis=1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, num_alts - run_start, axis=1)
+    return ranks
+
+def sample_block(num_alts):
+    return max(1, min(SAMPLE_BLOCK, SAMPLE_BLOCK_BYTES // (8 * num_alts)))
+
+def accumulate(norm_mat, impacts, count, seed, alpha, low, high, max_rank):
+    # Streams `count` samples in blocks into rank counts and rank-1 weight sums
+    num_alts = norm_mat.shape[0]
+    block = sample_block(num_alts)
+    rng = np.random.default_rng(seed)
+    counts = np.zeros(num_alts * max_rank, dtype=np.int64)
+    first_weight_sum = np.zeros((num_alts, norm_mat.shape[1]))
+    norm_range = (norm_mat.min(axis=0), norm_mat.max(axis=0))
+    for start in range(0, count, block):
+        weights = sample_weights(rng, min(block, count - start), alpha, low, high)
+        ranks = ranks_per_sample(score_normalized_batch(norm_mat, weights, impacts, norm_range=norm_range))
+        keep = ranks <= max_rank
+        alts = np.broadcast_to(np.arange(num_alts), ranks.shape)
+        counts += np.bincount((alts[keep] * max_rank + ranks[keep] - 1), minlength=len(counts))
+        first_weight_sum += (ranks == 1).T.astype(float) @ weights
+    return counts.reshape(num_alts, max_rank), first_weight_sum
+
+_worker_state = None
+
+def init_worker(norm_mat, impacts, alpha, low, high, max_rank):
+    global _worker_state
+    _worker_state = (norm_mat, impacts, alpha, low, high, max_rank)
+
+def run_task(task):
+    count, seed = task
+    norm_mat, impacts, alpha, low, high, max_rank = _worker_state
+    return accumulate(norm_mat, impacts, count, seed, alpha, low, high, max_rank)
+
+def smaa_topsis(data_mat, impacts, samples=DEFAULT_SAMPLES, alpha=None, low=None, high=None,
+                seed=None, workers=1, max_rank=DEFAULT_MAX_RANK):
+    """
+    Rank acceptability analysis: scores `samples` random weight vectors and returns
+    (acceptability, central_weights). acceptability[i, r] is the share of samples
+    ranking alternative i at rank r + 1 (ranks up to max_rank, None for all of
+    them); central_weights[i] is the mean weight vector of the samples ranking it
+    first (NaN if none did). Weights are Dirichlet(alpha) (uniform on the simplex
+    by default) or uniform within [low, high] per criterion. Memory does not grow
+    with `samples`, and grows linearly with the number of alternatives.
+    """
+    num_alts, num_criteria = data_mat.shape
+    if low is None and alpha is None:
+        alpha = np.ones(num_criteria)
+    if (len(low) if low is not None else len(alpha)) != num_criteria:
+        error_and_exit("Number of weights must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria))
+    max_rank = num_alts if max_rank is None else min(max_rank, num_alts)
+    with stage('normalize', rows=num_alts, criteria=num_criteria, dtype=str(data_mat.dtype)):
+        norm_mat = normalize_matrix(data_mat)
+    seeds = np.random.SeedSequence(seed).spawn((samples + TASK_SAMPLES - 1) // TASK_SAMPLES)
+    tasks = [(min(TASK_SAMPLES, samples - i * TASK_SAMPLES), s) for i, s in enumerate(seeds)]
+    counts = np.zeros((num_alts, max_rank), dtype=np.int64)
+    first_weight_sum = np.zeros((num_alts, num_criteria))
+    with stage('score', samples=samples):
+        state = (norm_mat, impacts, alpha, low, high, max_rank)
+        if workers <= 1 or len(tasks) <= 1:
+            results = (accumulate(norm_mat, impacts, count, s, alpha, low, high, max_rank) for count, s in tasks)
+            for task_counts, task_weights in results:
+                counts += task_counts
+                first_weight_sum += task_weights
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), initializer=init_worker, initargs=state) as pool:
+                for task_counts, task_weights in pool.map(run_task, tasks):
+                    counts += task_counts
+                    first_weight_sum += task_weights
+    acceptability = counts / samples
+    with np.errstate(invalid='ignore', divide='ignore'):
+        central_weights = first_weight_sum / counts[:, :1]
+    return acceptability, central_weights
+
+def parse_intervals(text):
+    low, high = [], []
+    for part in text.split(','):
+        bounds = part.strip().split(':')
+        try:
+            lo, hi = float(bounds[0]), float(bounds[1])
+        except (ValueError, IndexError):
+            error_and_exit("Weight intervals must be comma separated LOW:HIGH pairs")
+        if len(bounds) != 2 or lo < 0 or hi < lo or hi == 0:
+            error_and_exit("Weight intervals must satisfy 0 <= LOW <= HIGH and HIGH > 0")
+        low.append(lo)
+        high.append(hi)
+    return np.array(low), np.array(high)
+
+def main(args):
+    args = list(args)
+    samples = pop_option(args, '--samples')
+    seed = pop_option(args, '--seed')
+    workers = pop_option(args, '--workers')
+    max_rank = pop_option(args, '--ranks')
+    weights_str = pop_option(args, '--weights')
+    concentration = pop_option(args, '--concentration')
+    intervals = pop_option(args, '--weight-intervals')
+    if len(args) != 3 or (intervals is not None and (weights_str is not None or concentration is not None)):
+        print(USAGE)
+        sys.exit(1)
+    input_file, impacts_str, result_file = args
+    samples = DEFAULT_SAMPLES if samples is None else parse_positive_int(samples, "--samples")
+    workers = (os.cpu_count() or 1) if workers is None else parse_positive_int(workers, "--workers")
+    max_rank = DEFAULT_MAX_RANK if max_rank is None else parse_positive_int(max_rank, "--ranks")
+    if seed is not None:
+        try:
+            seed = int(seed)
+        except ValueError:
+            error_and_exit("--seed must be an integer")
+    from topsis_mrinank_102303235.formats import read_input, write_table
+    with stage('read'):
+        df, data_mat = read_input(input_file)
+    num_criteria = df.shape[1] - 1
+    impacts = parse_impacts(impacts_str)
+    if len(impacts) != num_criteria:
+        error_and_exit("Number of impacts must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria))
+    alpha = low = high = None
+    if intervals is not None:
+        low, high = parse_intervals(intervals)
+    elif weights_str is not None or concentration is not None:
+        weights = parse_weights(weights_str) if weights_str is not None else np.ones(num_criteria)
+        if len(weights) != num_criteria:
+            error_and_exit("Number of weights must be equal to number of criteria columns (from 2nd to last). Expected " + str(num_criteria))
+        try:
+            concentration = num_criteria if concentration is None else float(concentration)
+        except ValueError:
+            error_and_exit("--concentration must be a positive number")
+        if not concentration > 0 or not (weights > 0).all():
+            error_and_exit("--concentration and all weights must be positive for Dirichlet sampling")
+        alpha = concentration * weights / weights.sum()
+    if data_mat is None:
+        with stage('ensure_numeric'):
+            data_mat = ensure_numeric(df, list(range(1, df.shape[1]))).values
+    acceptability, central_weights = smaa_topsis(data_mat, impacts, samples, alpha, low, high, seed, workers, max_rank)
+    import pandas as pd
+    with stage('write'):
+        result = pd.DataFrame({df.columns[0]: df.iloc[:, 0].values})
+        for r in range(acceptability.shape[1]):
+            result['Rank ' + str(r + 1)] = np.round(acceptability[:, r], 6)
+        for j, name in enumerate(df.columns[1:]):
+            result['Central Weight ' + str(name)] = np.round(central_weights[:, j], 6)
+        write_table(result, result_file)
+    print("Output written to", result_file)
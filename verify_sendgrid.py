@@ -5,17 +5,22 @@ Run this to verify your SendGrid setup is correct before deploying
 """
 
 import os
+import sys
 import requests
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def test_sendgrid_setup():
+def test_sendgrid_setup(base_url=None):
     """Test if SendGrid is properly configured"""
     
+    # SENDGRID_API_BASE (or --base-url) can point at a local stand-in such as sendgrid_stub.py
+    base_url = (base_url or os.getenv("SENDGRID_API_BASE", "https://api.sendgrid.com")).rstrip("/")
+    
     print("\n" + "="*60)
     print("🔍 SendGrid Setup Verification")
     print("="*60 + "\n")
+    print(f"Endpoint: {base_url}\n")
     
     # Step 1: Check API Key
     print("Step 1: Checking API Key...")
@@ -56,7 +61,7 @@ def test_sendgrid_setup():
     try:
         # Test with account endpoint
         response = requests.get(
-            "https://api.sendgrid.com/v3/user/account",
+            f"{base_url}/v3/user/account",
             headers=headers,
             timeout=10
         )
@@ -98,7 +103,7 @@ def test_sendgrid_setup():
         }
         
         response = requests.post(
-            "https://api.sendgrid.com/v3/mail/send",
+            f"{base_url}/v3/mail/send",
             json=payload,
             headers=headers,
             timeout=10
@@ -130,5 +135,9 @@ def test_sendgrid_setup():
 
 
 if __name__ == "__main__":
-    success = test_sendgrid_setup()
+    base_url = None
+    if "--base-url" in sys.argv:
+        i = sys.argv.index("--base-url")
+        base_url = sys.argv[i + 1] if i + 1 < len(sys.argv) else None
+    success = test_sendgrid_setup(base_url)
     exit(0 if success else 1)